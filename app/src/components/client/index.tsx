@@ -206,9 +206,11 @@ export default function Client() {
   useEffect(() => {
     window.addEventListener("keydown", inputController.onKeyDown);
     window.addEventListener("keyup", inputController.onKeyUp);
+    window.addEventListener("paste", inputController.onPaste);
     return () => {
       window.removeEventListener("keydown", inputController.onKeyDown);
       window.removeEventListener("keyup", inputController.onKeyUp);
+      window.removeEventListener("paste", inputController.onPaste);
     };
   }, []);
 
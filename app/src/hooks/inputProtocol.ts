@@ -0,0 +1,128 @@
+import type { EventData } from "./useController";
+
+// Binary input event encoding; must stay in sync with venv/input_protocol.py
+export const PROTOCOL_VERSION = 1;
+
+const HEADER_SIZE = 12;
+const RECORD_SIZE = 16;
+const MAX_BATCH = 0xffff;
+
+const EVENT_TYPES: EventData["type"][] = [
+  "mousemove",
+  "mousedown",
+  "mouseup",
+  "wheel",
+  "keydown",
+  "keyup",
+];
+
+const MOD_CTRL = 0x01;
+const MOD_SHIFT = 0x02;
+const MOD_ALT = 0x04;
+const MOD_META = 0x08;
+const MOD_DRAGGING = 0x10;
+const MOD_CHAR = 0x80;
+
+const fKeys = Array.from({ length: 24 }, (_, i) => `F${i + 1}`);
+
+// Append-only tables, index 0 = none
+const KEY_NAMES = [
+  "", "Enter", "Escape", "Backspace", "Tab", "Delete",
+  "ArrowUp", "ArrowDown", "ArrowLeft", "ArrowRight",
+  "Home", "End", "PageUp", "PageDown",
+  "Control", "Shift", "Alt", "AltGraph", "Meta", "OS",
+  "CapsLock", "NumLock", "ScrollLock",
+  "Insert", "PrintScreen", "ContextMenu", "Pause",
+  "Dead", "Unidentified",
+  ...fKeys,
+];
+
+const CODE_NAMES = [
+  "", "ShiftLeft", "ShiftRight", "ControlLeft", "ControlRight",
+  "AltLeft", "AltRight", "MetaLeft", "MetaRight", "OSLeft", "OSRight",
+  "Space", "Enter", "NumpadEnter", "Tab", "Backspace", "Delete", "Escape",
+  "ArrowUp", "ArrowDown", "ArrowLeft", "ArrowRight",
+  "Home", "End", "PageUp", "PageDown",
+  "Insert", "PrintScreen", "ContextMenu", "Pause",
+  "CapsLock", "NumLock", "ScrollLock",
+  ...fKeys,
+];
+
+const KEY_IDS = new Map(KEY_NAMES.map((name, i) => [name, i]));
+const CODE_IDS = new Map(CODE_NAMES.map((name, i) => [name, i]));
+
+const clamp = (value = 0) =>
+  Math.max(-0x8000, Math.min(0x7fff, Math.round(value)));
+
+// Returns false if the event cannot be represented and must go as JSON
+export const canEncode = (event: EventData) => {
+  if (event.type !== "keydown" && event.type !== "keyup") return true;
+  const key = event.key ?? "";
+  return KEY_IDS.has(key) || (key.length === 1 && key.charCodeAt(0) <= 0xffff);
+};
+
+export const encodeEvents = (events: EventData[]): ArrayBuffer => {
+  if (events.length > MAX_BATCH) {
+    throw new RangeError(`Too many events in one frame: ${events.length}`);
+  }
+  const base = Math.min(...events.map((e) => e.timestamp));
+  const buffer = new ArrayBuffer(HEADER_SIZE + events.length * RECORD_SIZE);
+  const view = new DataView(buffer);
+
+  view.setUint8(0, PROTOCOL_VERSION);
+  view.setUint8(1, 0);
+  view.setUint16(2, events.length, true);
+  view.setBigUint64(4, BigInt(base), true);
+
+  events.forEach((event, i) => {
+    const offset = HEADER_SIZE + i * RECORD_SIZE;
+    let modifiers = 0;
+    if (event.ctrlKey) modifiers |= MOD_CTRL;
+    if (event.shiftKey) modifiers |= MOD_SHIFT;
+    if (event.altKey) modifiers |= MOD_ALT;
+    if (event.metaKey) modifiers |= MOD_META;
+    if (event.isDragging) modifiers |= MOD_DRAGGING;
+
+    let a = 0;
+    let b = 0;
+    let key = 0;
+    let code = 0;
+    switch (event.type) {
+      case "mousemove":
+        a = event.movementX ?? 0;
+        b = event.movementY ?? 0;
+        break;
+      case "wheel":
+        a = event.deltaX ?? 0;
+        b = event.deltaY ?? 0;
+        break;
+      case "mousedown":
+      case "mouseup":
+        a = event.button ?? 0;
+        break;
+      default: {
+        const name = event.key ?? "";
+        const id = KEY_IDS.get(name);
+        if (id !== undefined) {
+          key = id;
+        } else {
+          key = name.charCodeAt(0);
+          modifiers |= MOD_CHAR;
+        }
+        code = CODE_IDS.get(event.code ?? "") ?? 0;
+      }
+    }
+
+    view.setUint8(offset, EVENT_TYPES.indexOf(event.type));
+    view.setUint8(offset + 1, modifiers);
+    view.setUint8(offset + 2, code);
+    view.setInt16(offset + 4, clamp(a), true);
+    view.setInt16(offset + 6, clamp(b), true);
+    view.setInt16(offset + 8, clamp(event.x), true);
+    view.setInt16(offset + 10, clamp(event.y), true);
+    view.setUint16(offset + 12, key, true);
+    view.setUint16(offset + 14, Math.min(event.timestamp - base, 0xffff), true);
+  });
+
+  return buffer;
+};
@@ -0,0 +1,127 @@
+import type { Socket } from "socket.io-client";
+
+// Chunked text/clipboard transfer; must stay in sync with venv/text_transfer.py
+export type TextMode = "type" | "paste" | "clipboard";
+
+export interface TextProgress {
+  id: string;
+  received: number;
+  injected: number;
+  total: number | null;
+  credit: number;
+}
+
+export interface TextDone {
+  id: string;
+  ok: boolean;
+  injected: number;
+  error: string | null;
+}
+
+interface TextAck {
+  ok: boolean;
+  id?: string;
+  error?: string;
+  chunk_size?: number;
+  credit?: number;
+  received?: number;
+}
+
+// An unanswered request fails the transfer instead of waiting forever
+const ACK_TIMEOUT_MS = 10000;
+
+let transferCount = 0;
+
+// Never split a surrogate pair, so every chunk is valid text on its own
+const chunkEnd = (text: string, start: number, size: number) => {
+  const end = Math.min(text.length, start + size);
+  const last = text.charCodeAt(end - 1);
+  return end < text.length && end - start > 1 && last >= 0xd800 && last <= 0xdbff ? end - 1 : end;
+};
+
+export const sendText = async (
+  socket: Socket,
+  text: string,
+  mode: TextMode = "paste",
+  onProgress?: (progress: TextProgress) => void
+): Promise<TextDone> => {
+  const id = `text-${Date.now()}-${transferCount++}`;
+  let credit = 0;
+  let inFlight = 0;
+  let failure: string | null = null;
+  let waiter: (() => void) | null = null;
+  let resolveDone: (done: TextDone) => void = () => {};
+  const done = new Promise<TextDone>((resolve) => (resolveDone = resolve));
+
+  const wake = () => {
+    const resume = waiter;
+    waiter = null;
+    resume?.();
+  };
+  const handleProgress = (progress: TextProgress) => {
+    if (progress.id !== id) return;
+    credit = progress.credit;
+    onProgress?.(progress);
+    wake();
+  };
+  const handleDone = (result: TextDone) => {
+    if (result.id !== id) return;
+    if (!result.ok) failure = result.error || "text transfer failed";
+    resolveDone(result);
+    wake();
+  };
+  const check = (ack: TextAck) => {
+    if (!ack.ok) throw new Error(ack.error || "text transfer rejected");
+    return ack;
+  };
+
+  socket.on("text_progress", handleProgress);
+  socket.on("text_done", handleDone);
+  try {
+    const begin = check(
+      await socket.timeout(ACK_TIMEOUT_MS).emitWithAck("text_begin", { id, mode, length: text.length })
+    );
+    const chunkSize = begin.chunk_size || 8192;
+    credit = begin.credit ?? 1;
+
+    // Keep up to `credit` chunks unacknowledged; the server lowers it while typing lags
+    const acks: Promise<void>[] = [];
+    for (let offset = 0, seq = 0; offset < text.length; seq++) {
+      while (inFlight >= credit && !failure) {
+        await new Promise<void>((resolve) => (waiter = resolve));
+      }
+      if (failure) throw new Error(failure);
+      const end = chunkEnd(text, offset, chunkSize);
+      inFlight++;
+      acks.push(
+        socket
+          .timeout(ACK_TIMEOUT_MS)
+          .emitWithAck("text_chunk", { id, seq, data: text.slice(offset, end) })
+          .then(
+            (ack: TextAck) => {
+              if (ack.ok) credit = ack.credit ?? credit;
+              else failure = ack.error || "text chunk rejected";
+            },
+            (error) => {
+              failure = `text chunk not acknowledged: ${error}`;
+            }
+          )
+          .finally(() => {
+            inFlight--;
+            wake();
+          })
+      );
+      offset = end;
+    }
+    await Promise.all(acks);
+    if (failure) throw new Error(failure);
+    check(await socket.timeout(ACK_TIMEOUT_MS).emitWithAck("text_end", { id }));
+    return await done;
+  } catch (error) {
+    socket.emit("text_cancel", { id });
+    throw error;
+  } finally {
+    socket.off("text_progress", handleProgress);
+    socket.off("text_done", handleDone);
+  }
+};
@@ -1,6 +1,8 @@
 import { io, Socket } from "socket.io-client";
+import { canEncode, encodeEvents, PROTOCOL_VERSION } from "./inputProtocol";
+import { sendText as streamText, type TextMode } from "./textTransfer";
 
-interface EventData {
+export interface EventData {
   type: "mousemove" | "mousedown" | "mouseup" | "wheel" | "keydown" | "keyup";
   x?: number;
   y?: number;
@@ -9,6 +11,7 @@ interface EventData {
   deltaX?: number;
   deltaY?: number;
   deltaZ?: number;
+  button?: number;
   clientX?: number;
   clientY?: number;
   key?: string;
@@ -31,7 +34,12 @@ class InputController {
     // extraHeaders: {
     //   "Bypass-Tunnel-Reminder": "yup",
     // },
+    auth: { protocols: [PROTOCOL_VERSION] },
   });
+  // Binary batching is enabled once the server accepts it in "protocol"
+  binaryProtocol = false;
+  pendingEvents: EventData[] = [];
+  flushHandle: number | null = null;
   isCapturing = false;
   eventCount = 0;
   mouseDownInfo: { x: number; y: number; timestamp: number } | null = null;
@@ -52,6 +60,9 @@ class InputController {
     this.socket.on("connect", () => {
       console.log("connected");
     });
+    this.socket.on("protocol", ({ binary }: { binary: number }) => {
+      this.binaryProtocol = binary === PROTOCOL_VERSION;
+    });
   }
 
   log = (message: string) => {
@@ -67,8 +78,33 @@ class InputController {
 
   updateStats = () => {};
 
+  flushEvents = () => {
+    if (this.flushHandle !== null) {
+      cancelAnimationFrame(this.flushHandle);
+      this.flushHandle = null;
+    }
+    if (!this.pendingEvents.length) return;
+    const events = this.pendingEvents;
+    this.pendingEvents = [];
+    this.socket.emit("events", encodeEvents(events));
+  };
+
   sendEvent = (eventData: EventData) => {
+    if (this.socket && this.binaryProtocol && canEncode(eventData)) {
+      this.pendingEvents.push(eventData);
+      this.eventCount = this.eventCount + 1;
+      if (eventData.type !== "mousemove" && eventData.type !== "wheel") {
+        // Buttons and keys go out at once, together with the moves queued before them
+        this.flushEvents();
+      } else if (this.flushHandle === null) {
+        // Pointer events (each its own DOM task) share one binary frame per display frame
+        this.flushHandle = requestAnimationFrame(this.flushEvents);
+      }
+      return true;
+    }
     if (this.socket) {
+      // Keep ordering: anything batched so far must go before this JSON event
+      this.flushEvents();
       this.socket.emit("event", eventData);
       this.eventCount = this.eventCount + 1;
       console.log("this.socket", this.socket);
@@ -170,38 +206,69 @@ class InputController {
     this.sendEvent(eventData);
   };
 
+  // Ctrl/Cmd+V keydown is held back so the browser raises "paste": clipboard text goes
+  // over the bulk text channel, anything else (empty, image, files) is forwarded as keys
+  pasteChord: { down: KeyboardEvent; state: "pending" | "text" | "keys" } | null = null;
+
+  isPasteChord = (e: KeyboardEvent) => (e.ctrlKey || e.metaKey) && e.key.toLowerCase() === "v";
+
+  keyEvent = (type: "keydown" | "keyup", e: KeyboardEvent): EventData => ({
+    type,
+    key: e.key,
+    code: e.code,
+    keyCode: e.keyCode,
+    ctrlKey: e.ctrlKey,
+    shiftKey: e.shiftKey,
+    altKey: e.altKey,
+    metaKey: e.metaKey,
+    timestamp: Date.now(),
+  });
+
+  forwardPasteChord = () => {
+    if (this.pasteChord?.state !== "pending") return;
+    this.pasteChord.state = "keys";
+    this.sendEvent(this.keyEvent("keydown", this.pasteChord.down));
+  };
+
+  sendText = (text: string, mode: TextMode = "paste") =>
+    streamText(this.socket, text, mode, ({ injected, total }) => {
+      this.log(`text ${injected}/${total ?? "?"}`);
+    }).catch((error) => this.log(`text transfer failed: ${error}`));
+
+  onPaste = (e: ClipboardEvent) => {
+    const text = e.clipboardData?.getData("text/plain");
+    if (!text) {
+      this.forwardPasteChord();
+      return;
+    }
+    e.preventDefault();
+    if (this.pasteChord) this.pasteChord.state = "text";
+    this.flushEvents();
+    this.sendText(text, "paste");
+  };
+
   onKeyDown = (e: KeyboardEvent) => {
+    if (this.isPasteChord(e)) {
+      this.pasteChord = { down: e, state: "pending" };
+      // No "paste" event by the end of this task: forward the chord as it is
+      setTimeout(this.forwardPasteChord, 0);
+      return;
+    }
     e.preventDefault();
     this.pressedKeys.add(e.key);
-    const eventData: EventData = {
-      type: "keydown",
-      key: e.key,
-      code: e.code,
-      keyCode: e.keyCode,
-      ctrlKey: e.ctrlKey,
-      shiftKey: e.shiftKey,
-      altKey: e.altKey,
-      metaKey: e.metaKey,
-      timestamp: Date.now(),
-    };
-    this.sendEvent(eventData);
+    this.sendEvent(this.keyEvent("keydown", e));
   };
 
   onKeyUp = (e: KeyboardEvent) => {
+    const chord = this.pasteChord;
+    if (chord && e.code === chord.down.code) {
+      this.pasteChord = null;
+      if (chord.state === "text") return;
+      if (chord.state === "pending") this.sendEvent(this.keyEvent("keydown", chord.down));
+    }
     e.preventDefault();
     this.pressedKeys.add(e.key);
-    const eventData: EventData = {
-      type: "keyup",
-      key: e.key,
-      code: e.code,
-      keyCode: e.keyCode,
-      ctrlKey: e.ctrlKey,
-      shiftKey: e.shiftKey,
-      altKey: e.altKey,
-      metaKey: e.metaKey,
-      timestamp: Date.now(),
-    };
-    this.sendEvent(eventData);
+    this.sendEvent(this.keyEvent("keyup", e));
   };
 }
 
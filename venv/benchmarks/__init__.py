@@ -0,0 +1 @@
+"""Benchmarks for the input service; run modules with ``python -m benchmarks.<name>`` from venv/."""
@@ -0,0 +1,118 @@
+"""Frame hub fan-out benchmark.
+
+Simulates N local screen subscribers on a synthetic test-pattern source and
+reports capture+encode+fan-out CPU per frame and memory as N grows::
+
+    python -m benchmarks.fanout --subscribers 1,4,16,64 --frames 200
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from frame_hub import FrameHub
+from screen_capture import TestPatternSource
+
+
+class SimulatedClient:
+    """Holds sent buffers until it acks, like a socket send queue"""
+
+    def __init__(self, ack_every):
+        self.ack_every = ack_every
+        self.pending = None
+        self.on_ack = None
+        self.ticks = 0
+        self.bytes_received = 0
+
+    def receive(self, messages, on_ack):
+        self.pending = messages
+        self.on_ack = on_ack
+        self.bytes_received += sum(len(m) for m in messages)
+
+    def tick(self):
+        self.ticks += 1
+        if self.on_ack and self.ticks % self.ack_every == 0:
+            on_ack, self.on_ack, self.pending = self.on_ack, None, None
+            on_ack()
+
+
+def run_scenario(subscribers, frames, width, height, slow_fraction, slow_every, track_memory):
+    clients = {}
+    hub = FrameHub(
+        TestPatternSource(width, height),
+        emit=lambda sid, messages, on_ack: clients[sid].receive(messages, on_ack),
+        spawn=lambda fn: None,
+    )
+    slow_count = int(subscribers * slow_fraction)
+    for index in range(subscribers):
+        sid = f'viewer-{index}'
+        clients[sid] = SimulatedClient(slow_every if index < slow_count else 1)
+        hub.subscribe(sid)
+
+    def step():
+        hub.tick()
+        for client in clients.values():
+            client.tick()
+
+    for _ in range(10):
+        step()
+
+    if track_memory:
+        tracemalloc.start()
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(frames):
+        step()
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    result = {
+        'subscribers': subscribers,
+        'frames': frames,
+        'cpu_ms_per_frame': round(cpu / frames * 1000, 3),
+        'wall_ms_per_frame': round(wall / frames * 1000, 3),
+        'frames_encoded': hub.frames_encoded,
+        'keyframes_encoded': hub.keyframes_encoded,
+        'bytes_sent_per_frame': sum(c.bytes_received for c in clients.values()) // (frames + 10),
+        'frames_skipped': sum(s.frames_skipped for s in hub.subscribers.values()),
+    }
+    if track_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['traced_memory_kib'] = current // 1024
+        result['traced_peak_kib'] = peak // 1024
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', default='1,2,4,8,16,32,64')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--slow-fraction', type=float, default=0.25, help='share of subscribers that ack late')
+    parser.add_argument('--slow-every', type=int, default=8, help='slow subscribers ack every N frames')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'subs':>5} {'cpu ms/frame':>13} {'encoded':>8} {'keyframes':>9} {'KiB sent/frame':>15} {'mem KiB':>8} {'peak KiB':>9}")
+    for subscribers in (int(n) for n in args.subscribers.split(',')):
+        # CPU is measured without tracemalloc, memory in a second pass with it
+        result = run_scenario(subscribers, args.frames, args.width, args.height,
+                              args.slow_fraction, args.slow_every, track_memory=False)
+        memory = run_scenario(subscribers, min(args.frames, 50), args.width, args.height,
+                              args.slow_fraction, args.slow_every, track_memory=True)
+        result['traced_memory_kib'] = memory['traced_memory_kib']
+        result['traced_peak_kib'] = memory['traced_peak_kib']
+        results.append(result)
+        print(f"{subscribers:>5} {result['cpu_ms_per_frame']:>13} {result['frames_encoded']:>8} "
+              f"{result['keyframes_encoded']:>9} {result['bytes_sent_per_frame'] // 1024:>15} "
+              f"{result['traced_memory_kib']:>8} {result['traced_peak_kib']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,477 @@
+"""Synthetic Socket.IO load for the input service.
+
+Starts ``input_service.py`` with the null injector (or targets ``--url``), opens
+N python-socketio clients per scenario and replays mousemove/wheel/typing mixes
+at fixed rates. For each scenario it reports throughput, client-timestamp to
+injection latency (p50/p99/p999, from the server's
+``input_client_to_inject_seconds`` histogram), the client-side ack round trip,
+and server CPU and RSS. Results can be written as JSON and compared against a
+previous run to catch regressions::
+
+    pip install "python-socketio[client]" psutil   # psutil is optional on Linux
+    python -m benchmarks.loadgen --clients 1,8 --duration 5 --json HEAD.json
+    python -m benchmarks.loadgen --json new.json --compare HEAD.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from input_protocol import PROTOCOL_VERSION, encode_events
+
+try:
+    import socketio
+    SOCKETIO_AVAILABLE = True
+except ImportError:
+    SOCKETIO_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TYPED_TEXT = 'the quick brown fox jumps over the lazy dog '
+
+
+def mousemove_events():
+    for step in itertools.count():
+        # Small relative moves tracing a square, like a pointer-locked drag
+        dx, dy = ((3, 0), (0, 3), (-3, 0), (0, -3))[step // 50 % 4]
+        yield {'type': 'mousemove', 'x': 0, 'y': 0, 'movementX': dx, 'movementY': dy, 'isDragging': False}
+
+
+def wheel_events():
+    for step in itertools.count():
+        yield {'type': 'wheel', 'deltaX': 0, 'deltaY': 100 if step // 20 % 2 else -100}
+
+
+def typing_events():
+    for char in itertools.cycle(TYPED_TEXT):
+        code = 'Space' if char == ' ' else f'Key{char.upper()}'
+        for event_type in ('keydown', 'keyup'):
+            yield {'type': event_type, 'key': char, 'code': code,
+                   'ctrlKey': False, 'shiftKey': False, 'altKey': False, 'metaKey': False}
+
+
+def click_events():
+    for event_type in itertools.cycle(('mousedown', 'mouseup')):
+        yield {'type': event_type, 'button': 0, 'x': 0, 'y': 0}
+
+
+# Scenario name -> [(events per second per client, event stream)]
+SCENARIOS = {
+    'mousemove': [(250, mousemove_events)],
+    'wheel': [(60, wheel_events)],
+    'typing': [(20, typing_events)],  # 10 keys/s
+    'mixed': [(120, mousemove_events), (10, wheel_events), (8, typing_events), (2, click_events)],
+}
+
+
+class ServerProcess:
+    """The input service in a subprocess, headless; its output goes to a log file"""
+
+    def __init__(self, backend, port, extra_args=()):
+        self.url = f'http://127.0.0.1:{port}'
+        env = dict(os.environ, INPUT_LOG_LEVEL='WARNING')
+        env.pop('INPUT_RECORD_DIR', None)
+        # The dev server logs every request, which would bury the results table
+        self.log = tempfile.NamedTemporaryFile('w+', prefix='loadgen-server-', suffix='.log', delete=False)
+        self.ready = False
+        self.process = subprocess.Popen(
+            [sys.executable, 'input_service.py', '--backend', backend, '--injector', 'null',
+             '--host', '127.0.0.1', '--port', str(port), *extra_args],
+            cwd=SERVICE_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        self.pid = self.process.pid
+
+    def wait_ready(self, timeout=20.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'input_service.py exited with {self.process.returncode} '
+                                   f'(log: {self.log.name}):\n{self.log_tail()}')
+            try:
+                with urllib.request.urlopen(f'{self.url}/health', timeout=1):
+                    self.ready = True
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f'input_service.py did not become healthy within {timeout}s '
+                           f'(log: {self.log.name}):\n{self.log_tail()}')
+
+    def log_tail(self, lines=20):
+        with open(self.log.name) as f:
+            return ''.join(f.readlines()[-lines:])
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+        # Keep the log only when it explains a failed start
+        if self.ready:
+            os.unlink(self.log.name)
+
+
+class ProcessSampler:
+    """Samples CPU time and RSS of the server process (psutil, or /proc on Linux)"""
+
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._process = psutil.Process(pid) if PSUTIL_AVAILABLE and pid else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def available(self):
+        return self._process is not None or bool(self.pid and os.path.exists(f'/proc/{self.pid}/stat'))
+
+    def cpu_seconds(self):
+        if self._process is not None:
+            times = self._process.cpu_times()
+            return times.user + times.system
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def rss_bytes(self):
+        if self._process is not None:
+            return self._process.memory_info().rss
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+
+    def start(self):
+        self.peak_rss = self.rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+
+
+class LoadClient:
+    """One Socket.IO client replaying a scenario's event streams at fixed rates"""
+
+    def __init__(self, url, streams, binary=False, ack_every=10):
+        self.url = url
+        self.streams = streams
+        self.binary = binary
+        self.ack_every = ack_every
+        self.sio = socketio.Client(reconnection=False)
+        self.sent = 0
+        self.rejected = 0
+        self.max_lag = 0.0
+        self.ack_rtts = []
+
+    def connect(self):
+        auth = {'protocols': [PROTOCOL_VERSION]} if self.binary else None
+        self.sio.connect(self.url, transports=['websocket'], auth=auth, wait_timeout=10)
+
+    def disconnect(self):
+        self.sio.disconnect()
+
+    def _on_ack(self, sent_at):
+        def on_ack(queued=True):
+            self.ack_rtts.append(time.perf_counter() - sent_at)
+            if queued is False:
+                self.rejected += 1
+        return on_ack
+
+    def _send(self, event):
+        event['timestamp'] = time.time() * 1000
+        if self.binary:
+            # Ack round trips are only measured on the JSON path
+            self.sio.emit('events', encode_events([event], int(event['timestamp'])))
+        elif self.sent % self.ack_every == 0:
+            self.sio.emit('event', event, callback=self._on_ack(time.perf_counter()))
+        else:
+            self.sio.emit('event', event)
+        self.sent += 1
+
+    def run(self, start_at, duration):
+        """Send until ``start_at + duration``, keeping each stream on its own schedule"""
+        schedule = [[start_at, 1.0 / rate, make_events()] for rate, make_events in self.streams]
+        end_at = start_at + duration
+        while True:
+            entry = min(schedule, key=lambda item: item[0])
+            due = entry[0]
+            if due >= end_at:
+                return
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                self.max_lag = max(self.max_lag, -wait)
+            self._send(next(entry[2]))
+            entry[0] = due + entry[1]
+
+
+def fetch_metrics(url):
+    with urllib.request.urlopen(f'{url}/metrics', timeout=5) as response:
+        return response.read().decode()
+
+
+def parse_metrics(text):
+    """Counter totals and histogram buckets from Prometheus text, keyed by metric name"""
+    totals = {}
+    buckets = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        series, value = line.rsplit(' ', 1)
+        name, _, labels = series.partition('{')
+        if name.endswith('_bucket'):
+            bound = labels.split('le="', 1)[1].split('"', 1)[0]
+            key = (name[:-len('_bucket')], float(bound))
+            buckets[key] = buckets.get(key, 0) + float(value)
+        else:
+            totals[name] = totals.get(name, 0) + float(value)
+    return totals, buckets
+
+
+def histogram_quantile(before, after, name, q):
+    """Quantile of the samples a histogram gained between two scrapes, interpolated within buckets"""
+    bounds = sorted(bound for metric, bound in after if metric == name)
+    counts = [after[(name, bound)] - before.get((name, bound), 0) for bound in bounds]
+    if not counts or not counts[-1]:
+        return None
+    rank = q * counts[-1]
+    lower, previous = 0.0, 0
+    for bound, cumulative in zip(bounds, counts):
+        if cumulative >= rank:
+            if bound == float('inf'):
+                return lower
+            return lower + (bound - lower) * (rank - previous) / max(cumulative - previous, 1)
+        lower, previous = bound, cumulative
+    return lower
+
+
+def wait_drained(url, timeout=10.0):
+    """Wait until the server stops injecting, then return the final scrape"""
+    deadline = time.monotonic() + timeout
+    totals, buckets = parse_metrics(fetch_metrics(url))
+    while time.monotonic() < deadline:
+        time.sleep(0.25)
+        latest = parse_metrics(fetch_metrics(url))
+        if latest[0] == totals:
+            break
+        totals, buckets = latest
+    return totals, buckets
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def run_scenario(url, sampler, name, clients, duration, binary, ack_every):
+    load = [LoadClient(url, SCENARIOS[name], binary, ack_every) for _ in range(clients)]
+    for client in load:
+        client.connect()
+    time.sleep(0.2)
+    totals_before, buckets_before = parse_metrics(fetch_metrics(url))
+    if sampler:
+        cpu_before = sampler.cpu_seconds()
+        sampler.start()
+
+    start_at = time.perf_counter() + 0.1
+    threads = [threading.Thread(target=client.run, args=(start_at, duration), daemon=True) for client in load]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    send_seconds = time.perf_counter() - start_at
+    time.sleep(0.2)  # let outstanding acks arrive
+    for client in load:
+        client.disconnect()
+    totals, buckets = wait_drained(url)
+
+    def delta(metric):
+        return int(totals.get(metric, 0) - totals_before.get(metric, 0))
+
+    sent = sum(client.sent for client in load)
+    rtts = [rtt for client in load for rtt in client.ack_rtts]
+    end_to_end = 'input_client_to_inject_seconds'
+    result = {
+        'scenario': name,
+        'clients': clients,
+        'protocol': 'binary' if binary else 'json',
+        'duration_s': round(send_seconds, 3),
+        'target_events_per_s': sum(rate for rate, _ in SCENARIOS[name]) * clients,
+        'sent_per_s': round(sent / send_seconds, 1),
+        'received_per_s': round(delta('input_events_received_total') / send_seconds, 1),
+        'injected_per_s': round(delta('input_events_injected_total') / send_seconds, 1),
+        'events_sent': sent,
+        'events_received': delta('input_events_received_total'),
+        'events_injected': delta('input_events_injected_total'),
+        'events_coalesced': delta('input_events_coalesced_total'),
+        'events_dropped': delta('input_events_dropped_total'),
+        'client_max_lag_ms': _ms(max(client.max_lag for client in load)),
+        'latency_p50_ms': _ms(histogram_quantile(buckets_before, buckets, end_to_end, 0.5)),
+        'latency_p99_ms': _ms(histogram_quantile(buckets_before, buckets, end_to_end, 0.99)),
+        'latency_p999_ms': _ms(histogram_quantile(buckets_before, buckets, end_to_end, 0.999)),
+        'ack_rtt_p50_ms': _ms(percentile(rtts, 0.5)),
+        'ack_rtt_p99_ms': _ms(percentile(rtts, 0.99)),
+        'ack_rtt_p999_ms': _ms(percentile(rtts, 0.999)),
+        'acks_rejected': sum(client.rejected for client in load),
+    }
+    if sampler:
+        sampler.stop()
+        result['server_cpu_percent'] = round((sampler.cpu_seconds() - cpu_before) / send_seconds * 100, 1)
+        result['server_rss_mib'] = round(sampler.rss_bytes() / 2 ** 20, 1)
+        result['server_peak_rss_mib'] = round(sampler.peak_rss / 2 ** 20, 1)
+    return result
+
+
+def result_key(result):
+    return f"{result['scenario']}/{result['protocol']}/{result['clients']}"
+
+
+# Metric -> True if higher is better; compared with --tolerance
+COMPARED = {
+    'injected_per_s': True,
+    'latency_p50_ms': False,
+    'latency_p99_ms': False,
+    'ack_rtt_p99_ms': False,
+    'server_cpu_percent': False,
+    'server_peak_rss_mib': False,
+}
+
+
+def compare(baseline, results, tolerance):
+    """Print relative changes against a baseline run; returns the regressed (key, metric) pairs"""
+    previous = {result_key(result): result for result in baseline['results']}
+    regressions = []
+    print(f"\ncompared with {baseline.get('commit') or 'baseline'} (tolerance {tolerance:.0%})")
+    for result in results:
+        key = result_key(result)
+        old = previous.get(key)
+        if old is None:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > tolerance:
+                regressions.append((key, metric))
+                flag = ' !'
+            changes.append(f'{metric} {change:+.0%}{flag}')
+        print(f'{key:<24} ' + ', '.join(changes))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"comma list of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--clients', default='1,8', help='comma list of client counts')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of load per scenario')
+    parser.add_argument('--protocol', choices=('json', 'binary'), default='json')
+    parser.add_argument('--ack-every', type=int, default=10, help='request an ack for every Nth JSON event')
+    parser.add_argument('--backend', default='threading', help='server backend when starting the service')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--url', help='use a running service instead of starting one')
+    parser.add_argument('--pid', type=int, help='process id of the --url service, for CPU/RSS')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='baseline results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative change counted as a regression')
+    args = parser.parse_args(argv)
+
+    if not SOCKETIO_AVAILABLE:
+        parser.error('python-socketio client support is required: pip install "python-socketio[client]"')
+    scenarios = args.scenarios.split(',')
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    server = None
+    if args.url:
+        url, pid = args.url.rstrip('/'), args.pid
+    else:
+        server = ServerProcess(args.backend, args.port)
+        url, pid = server.url, server.pid
+    sampler = ProcessSampler(pid)
+    if not sampler.available():
+        sampler = None
+
+    results = []
+    try:
+        if server:
+            server.wait_ready()
+        print(f"{'scenario':<10} {'clients':>7} {'sent/s':>8} {'injected/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'p999 ms':>8} {'ack p99':>8} {'cpu %':>6} {'rss MiB':>8}")
+        for name in scenarios:
+            for clients in (int(n) for n in args.clients.split(',')):
+                result = run_scenario(url, sampler, name, clients, args.duration,
+                                      args.protocol == 'binary', args.ack_every)
+                results.append(result)
+                print(f"{name:<10} {clients:>7} {result['sent_per_s']:>8} {result['injected_per_s']:>10} "
+                      f"{result['latency_p50_ms']!s:>8} {result['latency_p99_ms']!s:>8} "
+                      f"{result['latency_p999_ms']!s:>8} {result['ack_rtt_p99_ms']!s:>8} "
+                      f"{result.get('server_cpu_percent')!s:>6} {result.get('server_peak_rss_mib')!s:>8}")
+    finally:
+        if server:
+            server.stop()
+
+    report = {
+        'commit': git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': None if args.url else args.backend,
+        'duration_s': args.duration,
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
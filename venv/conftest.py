@@ -0,0 +1,2 @@
+# test_input.py is a manual script that drives the real mouse and keyboard
+collect_ignore = ["test_input.py"]
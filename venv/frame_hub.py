@@ -0,0 +1,212 @@
+"""Capture once, encode once, fan out to every screen subscriber.
+
+Every captured frame that changed is encoded a single time into an immutable
+delta message (the tiles that changed since the previous frame) and appended to
+a small ring. Subscribers keep a cursor (the last sequence they received):
+
+* up to date              -> nothing to send
+* behind, still in ring   -> the missed deltas from the ring, as shared buffers
+* new, or behind the ring -> the newest keyframe, built once per sequence from
+                             the compressed-tile cache and shared by everyone
+
+A subscriber with an unacknowledged frame is skipped, so slow viewers fall
+behind the ring and are resynchronised with a keyframe instead of queueing.
+"""
+import collections
+import logging
+import threading
+import time
+
+from screen_capture import DEFAULT_TILE_SIZE, CaptureSizeChanged, TiledFrame
+
+logger = logging.getLogger(__name__)
+
+SCREEN_ROOM = 'screen'
+
+
+class HubFrame:
+    """One encoded delta in the ring"""
+
+    __slots__ = ('sequence', 'message')
+
+    def __init__(self, sequence, message):
+        self.sequence = sequence
+        self.message = message
+
+
+class Subscriber:
+    """Per-client cursor and counters"""
+
+    def __init__(self, sid):
+        self.sid = sid
+        self.cursor = -1  # last sequence received; -1 = needs a keyframe
+        self.in_flight = False
+        self.sent_at = 0.0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.keyframes_sent = 0
+        self.bytes_sent = 0
+
+
+class FrameHub:
+    """Captures the screen and fans encoded frames out to subscribers.
+
+    ``emit(sid, messages, on_ack)`` sends a list of frame messages to one client;
+    the client acknowledging them calls ``on_ack``. ``run_blocking(fn, *args)``
+    runs capture/encode off the event loop (a NativeExecutor's ``run``), and
+    ``spawn``/``sleep`` come from the server backend.
+    """
+
+    def __init__(self, source, emit, run_blocking=None, spawn=None, sleep=time.sleep,
+                 tile_size=DEFAULT_TILE_SIZE, min_fps=2, max_fps=30, ring_size=4, ack_timeout=2.0):
+        self.source = source
+        self.emit = emit
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self.spawn = spawn or (lambda fn: threading.Thread(target=fn, name='frame-hub', daemon=True).start())
+        self.sleep = sleep
+        self.tile_size = tile_size
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.ack_timeout = ack_timeout
+
+        self.subscribers = {}
+        self.frame = None
+        self.ring = collections.deque(maxlen=ring_size)
+        self.sequence = 0
+        self._keyframe = None  # (sequence, message)
+        self.fps = max_fps
+        self.capture_time = 0.0
+        self.frames_encoded = 0
+        self.keyframes_encoded = 0
+        self._running = False
+
+    def subscribe(self, sid):
+        self.subscribers[sid] = Subscriber(sid)
+        if not self._running:
+            self._running = True
+            self.spawn(self._run)
+
+    def unsubscribe(self, sid):
+        self.subscribers.pop(sid, None)
+
+    def stop(self):
+        self._running = False
+
+    def _reset(self):
+        width, height = self.source.size()
+        self.frame = TiledFrame(width, height, self.tile_size)
+        self.ring.clear()
+        self._keyframe = None
+        for subscriber in self.subscribers.values():
+            subscriber.cursor = -1
+
+    def _capture(self):
+        """Grab, hash and encode one frame (runs on the capture thread); returns changed tile count"""
+        if self.frame is None:
+            self._reset()
+        try:
+            self.source.grab(self.frame.pixels)
+        except CaptureSizeChanged:
+            logger.info(f"Screen resolution changed to {self.source.size()}")
+            self._reset()
+            self.source.grab(self.frame.pixels)
+        changed = self.frame.rehash()
+        if changed:
+            self.sequence += 1
+            self.ring.append(HubFrame(self.sequence, self.frame.encode(changed, self.sequence)))
+            self.frames_encoded += 1
+        return len(changed)
+
+    def _build_keyframe(self):
+        if self._keyframe is None or self._keyframe[0] != self.sequence:
+            message = self.frame.encode(self.frame.all_tiles, self.sequence, keyframe=True)
+            self._keyframe = (self.sequence, message)
+            self.keyframes_encoded += 1
+        return self._keyframe[1]
+
+    def keyframe(self):
+        """Newest keyframe, shared by every subscriber that needs one"""
+        if self._keyframe is not None and self._keyframe[0] == self.sequence:
+            return self._keyframe[1]
+        return self.run_blocking(self._build_keyframe)
+
+    def _deliver(self, subscriber, now):
+        if subscriber.in_flight:
+            if now - subscriber.sent_at < self.ack_timeout:
+                subscriber.frames_skipped += 1
+                return
+            # Lost ack: resync from a keyframe
+            subscriber.cursor = -1
+        if subscriber.cursor == self.sequence or not self.ring:
+            return
+
+        if subscriber.cursor < 0 or subscriber.cursor + 1 < self.ring[0].sequence:
+            messages = [self.keyframe()]
+            subscriber.keyframes_sent += 1
+        else:
+            messages = [frame.message for frame in self.ring if frame.sequence > subscriber.cursor]
+
+        subscriber.cursor = self.sequence
+        subscriber.in_flight = True
+        subscriber.sent_at = now
+        subscriber.frames_sent += 1
+        sent = subscriber.frames_sent
+
+        def on_ack(*_args):
+            # A late ack for a send that timed out must not release the one after it
+            if subscriber.frames_sent == sent:
+                subscriber.in_flight = False
+
+        subscriber.bytes_sent += sum(len(message) for message in messages)
+        self.emit(subscriber.sid, messages, on_ack)
+
+    def tick(self):
+        """Capture one frame and deliver it; returns the number of changed tiles"""
+        started = time.monotonic()
+        changed = self.run_blocking(self._capture)
+        for subscriber in list(self.subscribers.values()):
+            self._deliver(subscriber, started)
+        self.capture_time = time.monotonic() - started
+        return changed
+
+    def _run(self):
+        while self._running:
+            if not self.subscribers:
+                self.sleep(0.2)
+                continue
+            try:
+                changed = self.tick()
+            except Exception as e:
+                logger.error(f"Screen capture failed: {e}")
+                changed = 0
+
+            # Adaptive rate: full speed while the screen changes, back off when idle,
+            # and never schedule faster than capture+encode can keep up with
+            if changed:
+                self.fps = self.max_fps
+            else:
+                self.fps = max(self.min_fps, self.fps * 0.8)
+            interval = max(1.0 / self.fps, self.capture_time * 1.5)
+            self.sleep(max(0.0, interval - self.capture_time))
+
+    def get_stats(self):
+        """Streaming statistics"""
+        return {
+            'source': self.source.name,
+            'resolution': self.source.size(),
+            'fps': round(self.fps, 1),
+            'capture_ms': round(self.capture_time * 1000, 2),
+            'sequence': self.sequence,
+            'frames_encoded': self.frames_encoded,
+            'keyframes_encoded': self.keyframes_encoded,
+            'ring_bytes': sum(len(frame.message) for frame in self.ring),
+            'subscribers': {
+                sid: {
+                    'frames_sent': subscriber.frames_sent,
+                    'frames_skipped': subscriber.frames_skipped,
+                    'keyframes_sent': subscriber.keyframes_sent,
+                    'bytes_sent': subscriber.bytes_sent,
+                }
+                for sid, subscriber in list(self.subscribers.items())
+            },
+        }
@@ -0,0 +1,163 @@
+"""OS input injection backends.
+
+InputHandler talks to an Injector in browser terms (DOM key/code names, mouse
+button numbers); the injector translates and performs the call. Use
+``open_injector`` to pick one by name:
+
+* ``pynput``    - real mouse/keyboard injection (default)
+* ``recording`` - remembers the latest calls, for tests and replay checks
+* ``null``      - does nothing, for headless load tests
+"""
+import collections
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Injector:
+    """Base injector: every call is a no-op"""
+
+    name = 'null'
+
+    def move_to(self, x, y):
+        pass
+
+    def move_by(self, dx, dy):
+        pass
+
+    def press_button(self, button):
+        pass
+
+    def release_button(self, button):
+        pass
+
+    def scroll(self, dx, dy):
+        pass
+
+    def press_key(self, key, code=None):
+        pass
+
+    def release_key(self, key, code=None):
+        pass
+
+    def type_text(self, text):
+        pass
+
+    def set_clipboard(self, text):
+        pass
+
+
+NullInjector = Injector
+
+
+# Calls a RecordingInjector keeps by default; older ones are discarded so a
+# long-running service started with --injector recording stays bounded
+RECORDING_MAXLEN = 10000
+
+
+class RecordingInjector(Injector):
+    """Records the latest calls as (monotonic time, method, args) instead of touching the OS"""
+
+    name = 'recording'
+
+    def __init__(self, maxlen=RECORDING_MAXLEN):
+        self.calls = collections.deque(maxlen=maxlen)
+
+    def _record(self, method, *args):
+        self.calls.append((time.monotonic(), method, args))
+
+    def move_to(self, x, y):
+        self._record('move_to', x, y)
+
+    def move_by(self, dx, dy):
+        self._record('move_by', dx, dy)
+
+    def press_button(self, button):
+        self._record('press_button', button)
+
+    def release_button(self, button):
+        self._record('release_button', button)
+
+    def scroll(self, dx, dy):
+        self._record('scroll', dx, dy)
+
+    def press_key(self, key, code=None):
+        self._record('press_key', key, code)
+
+    def release_key(self, key, code=None):
+        self._record('release_key', key, code)
+
+    def type_text(self, text):
+        self._record('type_text', text)
+
+    def set_clipboard(self, text):
+        self._record('set_clipboard', text)
+
+
+class PynputInjector(Injector):
+    """Injects through pynput; imported lazily so headless runs never load it"""
+
+    name = 'pynput'
+
+    def __init__(self):
+        from pynput.keyboard import Controller as KeyboardController
+        from pynput.mouse import Button, Controller as MouseController
+
+        from key_mapping import MOUSE_BUTTONS, resolve_key
+
+        self.mouse = MouseController()
+        self.keyboard = KeyboardController()
+        self._buttons = MOUSE_BUTTONS
+        self._default_button = Button.left
+        self._resolve_key = resolve_key
+
+    def _key(self, key, code):
+        pynput_key = self._resolve_key(key, code)
+        if pynput_key is None:
+            raise ValueError(f"Unsupported key: {key} (code: {code})")
+        return pynput_key
+
+    def move_to(self, x, y):
+        self.mouse.position = (int(x), int(y))
+
+    def move_by(self, dx, dy):
+        self.mouse.move(int(dx), int(dy))
+
+    def press_button(self, button):
+        self.mouse.press(self._buttons.get(button, self._default_button))
+
+    def release_button(self, button):
+        self.mouse.release(self._buttons.get(button, self._default_button))
+
+    def scroll(self, dx, dy):
+        self.mouse.scroll(dx, dy)
+
+    def press_key(self, key, code=None):
+        self.keyboard.press(self._key(key, code))
+
+    def release_key(self, key, code=None):
+        self.keyboard.release(self._key(key, code))
+
+    def type_text(self, text):
+        self.keyboard.type(text)
+
+    def set_clipboard(self, text):
+        import pyperclip
+        pyperclip.copy(text)
+
+
+INJECTORS = {
+    'pynput': PynputInjector,
+    'recording': RecordingInjector,
+    'null': NullInjector,
+}
+
+
+def open_injector(name='pynput'):
+    """Create an injector by name"""
+    try:
+        injector_class = INJECTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown injector: {name} (choose from {', '.join(INJECTORS)})") from None
+    return injector_class()
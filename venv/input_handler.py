@@ -0,0 +1,272 @@
+import logging
+import time
+
+from injectors import Injector
+from input_metrics import InputMetrics
+from input_pipeline import InjectionPipeline
+
+logger = logging.getLogger(__name__)
+
+BUTTON_NAMES = {0: 'Left', 1: 'Middle', 2: 'Right'}
+
+
+class InputHandler:
+    """Handles incoming input events and optionally executes them"""
+    
+    def __init__(self, injector=None, execute_inputs=False, max_rate=60, queue_size=256,
+                 metrics=None, run_blocking=None, recorder=None, text_transfers=None):
+        self.injector = injector or Injector()
+        self.execute_inputs = execute_inputs
+        self.metrics = metrics or InputMetrics()
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self.recorder = recorder
+        self.text_transfers = text_transfers  # TextTransferManager for bulk text, if any
+        self.event_count = 0
+        self.mouse_position = (0, 0)
+        self.pressed_keys = set()
+        self.protocol_version = 0  # 0 = JSON only
+        self._held_keys = set()  # (key, code) pairs pressed on the injector
+        self._held_buttons = set()
+        self.clock_offset_ms = None  # min(server - client) timestamp, tracks clock skew
+        self.pipeline = InjectionPipeline(self._inject, max_queue=queue_size, max_rate=max_rate, metrics=self.metrics)
+    
+    def _inject(self, event_data):
+        """Pipeline dispatch: handle the event on the shared injection thread"""
+        return self.run_blocking(self.handle_event, event_data)
+    
+    def submit(self, event_data, received_at=None):
+        """Queue an event for the injection worker instead of handling it inline"""
+        metrics = self.metrics
+        metrics.events_received.inc(event_data.get('type'))
+        if self.recorder:
+            self.recorder.write(event_data)
+        timestamp = event_data.get('timestamp')
+        if timestamp:
+            delay_ms = time.time() * 1000 - timestamp
+            metrics.client_delay.observe(delay_ms / 1000.0)
+            # The smallest observed delay approximates the clock offset (network delay ~ 0)
+            if self.clock_offset_ms is None or delay_ms < self.clock_offset_ms:
+                self.clock_offset_ms = delay_ms
+        return self.pipeline.submit(event_data, received_at)
+    
+    def close(self):
+        """Flush pending events, cancel text transfers and stop the injection workers"""
+        self.pipeline.close()
+        if self.text_transfers:
+            self.text_transfers.close()
+        if self.recorder:
+            self.recorder.close()
+        
+    def handle_event(self,event_data):
+        """Process an input event; returns False if it was unknown or its injection failed"""
+        event_type = event_data.get('type')
+        started = time.perf_counter()
+        self.event_count += 1
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Event: {event_type}")
+        
+        try:
+            if event_type == 'mousemove':
+                self._handle_mousemove(event_data)
+            elif event_type == 'mousedown':
+                self._handle_mousedown(event_data)
+            elif event_type == 'mouseup':
+                self._handle_mouseup(event_data)
+            elif event_type == 'wheel':
+                self._handle_wheel(event_data)
+            elif event_type == 'keydown':
+                self._handle_keydown(event_data)
+            elif event_type == 'keyup':
+                self._handle_keyup(event_data)
+            else:
+                logger.warning(f"Unknown event type: {event_type}")
+                return False
+                
+        except Exception as e:
+            self.metrics.injection_failures.inc(event_type)
+            logger.error(f"Error handling {event_type} event: {e}")
+            return False
+        finally:
+            self.metrics.handle_time.observe(time.perf_counter() - started, event_type)
+        
+        timestamp = event_data.get('timestamp')
+        if timestamp:
+            self.metrics.end_to_end.observe(time.time() - timestamp / 1000.0)
+        return True
+    
+    def _handle_mousemove(self, event_data):
+        """Handle mouse movement"""
+        x = event_data.get('x', 0)
+        y = event_data.get('y', 0)
+        movement_x = event_data.get('movementX', 0)
+        movement_y = event_data.get('movementY', 0)
+        
+        # Update tracked position
+        if movement_x != 0 or movement_y != 0:
+            # Use relative movement (from pointer lock)
+            new_x = self.mouse_position[0] + movement_x
+            new_y = self.mouse_position[1] + movement_y
+        else:
+            # Use absolute position
+            new_x, new_y = x, y
+            
+        self.mouse_position = (new_x, new_y)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Mouse: ({new_x}, {new_y}) [Δ{movement_x}, Δ{movement_y}]")
+        
+        # Execute if enabled
+        if self.execute_inputs:
+            if movement_x != 0 or movement_y != 0:
+                # Use relative movement
+                self.injector.move_by(movement_x, movement_y)
+            else:
+                # Use absolute positioning
+                self.injector.move_to(new_x, new_y)
+    
+    def _handle_mousedown(self, event_data):
+        """Handle mouse button press"""
+        button = event_data.get('button', 0)
+        x = event_data.get('x', 0)
+        y = event_data.get('y', 0)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            button_name = BUTTON_NAMES.get(button, f'Button{button}')
+            logger.debug(f"Mouse Down: {button_name} at ({x}, {y})")
+        
+        # Execute if enabled
+        if self.execute_inputs:
+            self.injector.press_button(button)
+            self._held_buttons.add(button)
+    
+    def _handle_mouseup(self, event_data):
+        """Handle mouse button release"""
+        button = event_data.get('button', 0)
+        x = event_data.get('x', 0)
+        y = event_data.get('y', 0)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            button_name = BUTTON_NAMES.get(button, f'Button{button}')
+            logger.debug(f"Mouse Up: {button_name} at ({x}, {y})")
+        
+        # Execute if enabled
+        if self.execute_inputs:
+            self.injector.release_button(button)
+            self._held_buttons.discard(button)
+    
+    def _handle_wheel(self, event_data):
+        """Handle mouse wheel"""
+        delta_x = event_data.get('deltaX', 0)
+        delta_y = event_data.get('deltaY', 0)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Mouse Wheel: X={delta_x}, Y={delta_y}")
+        
+        # Execute if enabled
+        if self.execute_inputs:
+            # Convert web wheel delta to scroll units
+            scroll_x = -delta_x / 100
+            scroll_y = -delta_y / 100
+            self.injector.scroll(scroll_x, scroll_y)
+    
+    def _handle_keydown(self, event_data):
+        """Handle key press"""
+        key = event_data.get('key', '')
+        code = event_data.get('code', '')
+        ctrl_key = event_data.get('ctrlKey', False)
+        shift_key = event_data.get('shiftKey', False)
+        alt_key = event_data.get('altKey', False)
+        meta_key = event_data.get('metaKey', False)
+        
+        self.pressed_keys.add(key)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            modifiers = []
+            if ctrl_key: modifiers.append('Ctrl')
+            if shift_key: modifiers.append('Shift')
+            if alt_key: modifiers.append('Alt')
+            if meta_key: modifiers.append('Meta')
+            
+            modifier_str = '+'.join(modifiers)
+            full_key = f"{modifier_str}+{key}" if modifiers else key
+            
+            logger.debug(f"Key Down: {full_key} (code: {code})")
+        
+        # Execute if enabled
+        if self.execute_inputs:
+            self._press_key(key, ctrl_key, shift_key, alt_key, meta_key, code)
+    
+    def _handle_keyup(self, event_data):
+        """Handle key release"""
+        key = event_data.get('key', '')
+        code = event_data.get('code', '')
+        
+        self.pressed_keys.discard(key)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Key Up: {key} (code: {code})")
+        
+        # Execute if enabled
+        if self.execute_inputs:
+            self._release_key(key, code)
+    
+    def _press_key(self, key, ctrl=False, shift=False, alt=False, meta=False, code=None):
+        """Press the key, adding modifiers from the event flags that are not already held.
+
+        A modifier pressed only because of a flag (its own keydown was never seen,
+        e.g. it went down before the page had focus) is released again right after
+        the key, so it cannot stay stuck on the host.
+        """
+        held = {name for name, _code in self._held_keys}
+        added = []
+        for active, name in ((ctrl, 'Control'), (shift, 'Shift'), (alt, 'Alt'), (meta, 'Meta')):
+            if active and key != name and name not in held:
+                self.injector.press_key(name)
+                added.append(name)
+        
+        # Press the main key
+        try:
+            self.injector.press_key(key, code)
+            self._held_keys.add((key, code))
+        finally:
+            for name in reversed(added):
+                self.injector.release_key(name)
+    
+    def _release_key(self, key, code=None):
+        """Release a key"""
+        self.injector.release_key(key, code)
+        self._held_keys.discard((key, code))
+    
+    def release_all(self):
+        """Release every key and mouse button this handler still holds down"""
+        if not self.execute_inputs:
+            return
+        for key, code in self._held_keys:
+            try:
+                self.injector.release_key(key, code)
+            except Exception as e:
+                logger.error(f"Failed to release key {key}: {e}")
+        for button in self._held_buttons:
+            try:
+                self.injector.release_button(button)
+            except Exception as e:
+                logger.error(f"Failed to release mouse button {button}: {e}")
+        self._held_keys.clear()
+        self._held_buttons.clear()
+        self.pressed_keys.clear()
+    
+    def get_stats(self):
+        """Get statistics about handled events"""
+        stats = {
+            'events_processed': self.event_count,
+            'mouse_position': self.mouse_position,
+            'pressed_keys': list(self.pressed_keys),
+            'execute_inputs': self.execute_inputs,
+            'injector': self.injector.name,
+        }
+        stats['clock_offset_ms'] = self.clock_offset_ms
+        stats.update(self.pipeline.get_stats())
+        if self.text_transfers:
+            stats.update(self.text_transfers.get_stats())
+        return stats
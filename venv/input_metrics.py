@@ -0,0 +1,195 @@
+"""Counters and fixed-bucket histograms for the input path, rendered as Prometheus text.
+
+Updates take no locks: the hot path only does a dict lookup, a bisect and an
+integer add. Under eventlet/gevent that is atomic; with the threading backend
+two native threads racing on the same bucket can very rarely lose an
+increment, which is acceptable for monitoring.
+"""
+import bisect
+import time
+
+# Seconds; roughly log-spaced from 100µs to 2.5s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Client clock -> server receive (includes clock offset, so it may be negative)
+SKEW_BUCKETS = (-1.0, -0.1, -0.01, 0.0, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# Event type label values; anything else a client sends is recorded as OTHER_LABEL so
+# the number of series stays fixed
+EVENT_TYPES = ('mousemove', 'mousedown', 'mouseup', 'wheel', 'keydown', 'keyup')
+OTHER_LABEL = 'other'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_name, label_value, extra=None):
+    pairs = []
+    if label_name:
+        pairs.append(f'{label_name}="{_escape(label_value)}"')
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter, optionally split by one label (limited to ``label_values`` if given)"""
+
+    def __init__(self, name, help_text, label=None, label_values=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.label_values = frozenset(label_values) if label_values else None
+        self.values = {}
+
+    def inc(self, label_value=None, amount=1):
+        if self.label_values is not None and label_value not in self.label_values:
+            label_value = OTHER_LABEL
+        values = self.values
+        values[label_value] = values.get(label_value, 0) + amount
+
+    def total(self):
+        return sum(self.values.values())
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        values = self.values if self.values or self.label else {None: 0}
+        for label_value, value in sorted(values.items(), key=lambda item: str(item[0])):
+            lines.append(f'{self.name}{_format_labels(self.label, label_value)} {value}')
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge', f'{self.name} {self.read()}']
+
+
+class _HistogramSeries:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by one label (limited to ``label_values`` if given)"""
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, label=None, label_values=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        self.label_values = frozenset(label_values) if label_values else None
+        self.series = {}
+
+    def observe(self, value, label_value=None):
+        if self.label_values is not None and label_value not in self.label_values:
+            label_value = OTHER_LABEL
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series.setdefault(label_value, _HistogramSeries(len(self.buckets) + 1))
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def quantile(self, q, label_value=None):
+        """Approximate quantile (upper bucket bound), or None with no samples"""
+        series = self.series.get(label_value)
+        if series is None or not series.count:
+            return None
+        rank = q * series.count
+        seen = 0
+        for bound, count in zip(self.buckets, series.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_value, series in sorted(self.series.items(), key=lambda item: str(item[0])):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                labels = _format_labels(self.label, label_value, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label, label_value, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {series.count}')
+            labels = _format_labels(self.label, label_value)
+            lines.append(f'{self.name}_sum{labels} {series.sum}')
+            lines.append(f'{self.name}_count{labels} {series.count}')
+        return lines
+
+
+class InputMetrics:
+    """All metrics for the input path"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.events_received = Counter(
+            'input_events_received_total', 'Input events received from clients',
+            label='type', label_values=EVENT_TYPES)
+        self.events_injected = Counter(
+            'input_events_injected_total', 'Input events handed to the OS injector',
+            label='type', label_values=EVENT_TYPES)
+        self.events_coalesced = Counter(
+            'input_events_coalesced_total', 'Mousemove events merged into a pending move')
+        self.events_dropped = Counter(
+            'input_events_dropped_total', 'Input events dropped because the queue was full',
+            label='type', label_values=EVENT_TYPES)
+        self.injection_failures = Counter(
+            'input_injection_failures_total', 'OS injection calls that raised',
+            label='type', label_values=EVENT_TYPES)
+        self.inject_latency = Histogram(
+            'input_receive_to_inject_seconds', 'Time from receiving an event to finishing its injection')
+        self.client_delay = Histogram(
+            'input_client_to_server_seconds', 'Server receive time minus client event timestamp',
+            buckets=SKEW_BUCKETS)
+        self.handle_time = Histogram(
+            'input_handle_seconds', 'Time spent handling one event',
+            label='type', label_values=EVENT_TYPES)
+        self.end_to_end = Histogram(
+            'input_client_to_inject_seconds', 'Client event timestamp to end of its injection (includes clock offset)')
+        self.text_chars = Counter(
+            'input_text_chars_total', 'Characters injected by bulk text transfers', label='mode')
+        self.text_transfers = Counter(
+            'input_text_transfers_total', 'Bulk text transfers by outcome', label='result')
+        self.gauges = []
+
+    def add_gauge(self, name, help_text, read):
+        self.gauges.append(Gauge(name, help_text, read))
+
+    def snapshot(self):
+        """Compact summary for the ``stats`` Socket.IO event"""
+        return {
+            'uptime_seconds': time.monotonic() - self.started,
+            'events_received': self.events_received.total(),
+            'events_injected': self.events_injected.total(),
+            'events_coalesced': self.events_coalesced.total(),
+            'events_dropped': self.events_dropped.total(),
+            'injection_failures': self.injection_failures.total(),
+            'inject_latency_p50': self.inject_latency.quantile(0.5),
+            'inject_latency_p99': self.inject_latency.quantile(0.99),
+            'client_delay_p50': self.client_delay.quantile(0.5),
+            'end_to_end_p99': self.end_to_end.quantile(0.99),
+        }
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in (
+            self.events_received, self.events_injected, self.events_coalesced, self.events_dropped,
+            self.injection_failures, self.inject_latency, self.client_delay, self.handle_time, self.end_to_end,
+            self.text_chars, self.text_transfers,
+            *self.gauges,
+        ):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,164 @@
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class InjectionPipeline:
+    """Bounded, per-connection queue that feeds input events to a worker thread.
+
+    Consecutive mousemove events that are still waiting in the queue are merged
+    into one (relative deltas are summed, the last absolute position wins), so a
+    burst of pointer updates turns into a single injection. Button, wheel and key
+    events are never merged or reordered. Mouse moves are injected at most
+    ``max_rate`` times per second, which should match the display refresh rate.
+    """
+
+    def __init__(self, dispatch, max_queue=256, max_rate=60, put_timeout=1.0, name="input-pipeline", metrics=None):
+        self.dispatch = dispatch
+        self.metrics = metrics
+        self.max_queue = max_queue
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.put_timeout = put_timeout
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._last_move = 0.0
+
+        self.submitted = 0
+        self.moves_submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.injected = 0
+        self.failed = 0
+        self.max_depth = 0
+
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, event_data, received_at=None):
+        """Queue an event for injection, merging it into a pending mousemove if possible.
+
+        ``received_at`` is the ``time.monotonic()`` at which the event arrived; a
+        merged move keeps the arrival time of the oldest event folded into it.
+        """
+        event_type = event_data.get('type')
+        is_move = event_type == 'mousemove'
+        with self._cond:
+            if not self._running:
+                return False
+            self.submitted += 1
+            if is_move:
+                self.moves_submitted += 1
+                if self._queue and self._queue[-1][0].get('type') == 'mousemove':
+                    self._merge(self._queue[-1][0], event_data)
+                    self.coalesced += 1
+                    if self.metrics:
+                        self.metrics.events_coalesced.inc()
+                    return True
+
+            deadline = None
+            while len(self._queue) >= self.max_queue:
+                if is_move:
+                    # A stale pointer update is worth less than waiting for space
+                    self._drop(event_type)
+                    return False
+                if deadline is None:
+                    deadline = time.monotonic() + self.put_timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    self._drop(event_type)
+                    logger.error(f"Input queue full, dropped {event_type} event")
+                    return False
+                self._cond.wait(remaining)
+
+            self._queue.append((event_data.copy(), received_at or time.monotonic()))
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+            return True
+
+    def _drop(self, event_type):
+        self.dropped += 1
+        if self.metrics:
+            self.metrics.events_dropped.inc(event_type)
+
+    @staticmethod
+    def _merge(pending, event_data):
+        """Fold a newer mousemove into one that has not been injected yet.
+
+        Like ``received_at``, the merged move keeps the oldest ``timestamp`` so
+        latency measured from it covers the longest-waiting event.
+        """
+        movement_x = pending.get('movementX', 0) + event_data.get('movementX', 0)
+        movement_y = pending.get('movementY', 0) + event_data.get('movementY', 0)
+        timestamp = pending.get('timestamp')
+        pending.update(event_data)
+        pending['movementX'] = movement_x
+        pending['movementY'] = movement_y
+        if timestamp:
+            pending['timestamp'] = timestamp
+
+    def _run(self):
+        """Worker loop: pop events in order and hand them to ``dispatch``"""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+
+                if self._queue[0][0].get('type') == 'mousemove' and self.min_interval:
+                    # Hold the move back until the rate gate opens; newer moves keep
+                    # merging into it while it waits at the head of the queue.
+                    wait = self._last_move + self.min_interval - time.monotonic()
+                    if wait > 0 and self._running:
+                        self._cond.wait(wait)
+                        continue
+
+                event_data, received_at = self._queue.popleft()
+                self._cond.notify_all()
+
+            event_type = event_data.get('type')
+            if event_type == 'mousemove':
+                self._last_move = time.monotonic()
+            try:
+                # False means dispatch already logged and counted the failure
+                injected = self.dispatch(event_data) is not False
+            except Exception as e:
+                logger.error(f"Error injecting {event_type} event: {e}")
+                if self.metrics:
+                    self.metrics.injection_failures.inc(event_type)
+                injected = False
+            if not injected:
+                self.failed += 1
+                continue
+            self.injected += 1
+            if self.metrics:
+                self.metrics.events_injected.inc(event_type)
+                self.metrics.inject_latency.observe(time.monotonic() - received_at)
+
+    def close(self, timeout=1.0):
+        """Stop accepting events, flush what is queued and stop the worker"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._worker is not threading.current_thread():
+            self._worker.join(timeout)
+
+    def get_stats(self):
+        """Get queue and coalescing statistics"""
+        with self._cond:
+            depth = len(self._queue)
+        return {
+            'queue_depth': depth,
+            'max_queue_depth': self.max_depth,
+            'events_submitted': self.submitted,
+            'events_injected': self.injected,
+            'events_failed': self.failed,
+            'events_coalesced': self.coalesced,
+            'events_dropped': self.dropped,
+            'coalesce_ratio': self.coalesced / self.moves_submitted if self.moves_submitted else 0.0,
+        }
@@ -0,0 +1,241 @@
+"""Compact binary encoding for input events.
+
+A frame is a 12-byte header followed by ``count`` fixed-size 16-byte records::
+
+    header  <BBHQ   version, flags, count, base timestamp (ms since epoch)
+    record  <BBBxhhhhHH
+            type, modifiers, code index, (pad),
+            a, b, x, y, key, timestamp offset (ms from base)
+
+``a``/``b`` carry movementX/Y for mousemove, deltaX/Y for wheel and the button
+number for mousedown/mouseup. ``key`` is an index into KEY_NAMES, or the BMP
+code point of a printable character when MOD_CHAR is set. Both name tables are
+append-only; reordering them requires a new PROTOCOL_VERSION.
+"""
+import struct
+
+PROTOCOL_VERSION = 1
+
+HEADER = struct.Struct('<BBHQ')
+RECORD = struct.Struct('<BBBxhhhhHH')
+
+MAX_BATCH = 0xFFFF
+
+EVENT_TYPES = ('mousemove', 'mousedown', 'mouseup', 'wheel', 'keydown', 'keyup')
+EVENT_TYPE_IDS = {name: index for index, name in enumerate(EVENT_TYPES)}
+
+# Modifier bitmask
+MOD_CTRL = 0x01
+MOD_SHIFT = 0x02
+MOD_ALT = 0x04
+MOD_META = 0x08
+MOD_DRAGGING = 0x10
+MOD_CHAR = 0x80
+
+MODIFIER_FLAGS = (
+    ('ctrlKey', MOD_CTRL),
+    ('shiftKey', MOD_SHIFT),
+    ('altKey', MOD_ALT),
+    ('metaKey', MOD_META),
+)
+
+# KeyboardEvent.key values for non-character keys (index 0 = no key)
+KEY_NAMES = (
+    '', 'Enter', 'Escape', 'Backspace', 'Tab', 'Delete',
+    'ArrowUp', 'ArrowDown', 'ArrowLeft', 'ArrowRight',
+    'Home', 'End', 'PageUp', 'PageDown',
+    'Control', 'Shift', 'Alt', 'AltGraph', 'Meta', 'OS',
+    'CapsLock', 'NumLock', 'ScrollLock',
+    'Insert', 'PrintScreen', 'ContextMenu', 'Pause',
+    'Dead', 'Unidentified',
+) + tuple(f'F{n}' for n in range(1, 25))
+KEY_IDS = {name: index for index, name in enumerate(KEY_NAMES)}
+
+# KeyboardEvent.code values the server distinguishes (index 0 = not sent)
+CODE_NAMES = (
+    '', 'ShiftLeft', 'ShiftRight', 'ControlLeft', 'ControlRight',
+    'AltLeft', 'AltRight', 'MetaLeft', 'MetaRight', 'OSLeft', 'OSRight',
+    'Space', 'Enter', 'NumpadEnter', 'Tab', 'Backspace', 'Delete', 'Escape',
+    'ArrowUp', 'ArrowDown', 'ArrowLeft', 'ArrowRight',
+    'Home', 'End', 'PageUp', 'PageDown',
+    'Insert', 'PrintScreen', 'ContextMenu', 'Pause',
+    'CapsLock', 'NumLock', 'ScrollLock',
+) + tuple(f'F{n}' for n in range(1, 25))
+CODE_IDS = {name: index for index, name in enumerate(CODE_NAMES)}
+
+INT16_MIN = -0x8000
+INT16_MAX = 0x7FFF
+
+
+class ProtocolError(ValueError):
+    """Raised for frames that cannot be decoded"""
+
+
+class BinaryEvent:
+    """One decoded record.
+
+    Exposes the same ``get``/item access as the JSON event dicts so InputHandler
+    and the injection pipeline can consume either, without building a dict.
+    """
+
+    __slots__ = (
+        'type', 'timestamp', 'x', 'y', 'movementX', 'movementY', 'deltaX', 'deltaY',
+        'button', 'key', 'code', 'ctrlKey', 'shiftKey', 'altKey', 'metaKey', 'isDragging',
+    )
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+    def __contains__(self, name):
+        return hasattr(self, name)
+
+    def keys(self):
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def copy(self):
+        event = BinaryEvent()
+        for name in self.keys():
+            setattr(event, name, getattr(self, name))
+        return event
+
+    def update(self, other):
+        """Copy fields from another event (dict or BinaryEvent), ignoring unknown ones"""
+        for name in other.keys():
+            if name in _SLOT_NAMES:
+                setattr(self, name, other[name])
+
+    def __eq__(self, other):
+        if not hasattr(other, 'keys'):
+            return NotImplemented
+        return {name: self[name] for name in self.keys()} == {name: other[name] for name in other.keys()}
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.keys())
+        return f'BinaryEvent({fields})'
+
+
+_SLOT_NAMES = frozenset(BinaryEvent.__slots__)
+
+
+def _clamp(value):
+    value = int(round(value or 0))
+    return INT16_MIN if value < INT16_MIN else INT16_MAX if value > INT16_MAX else value
+
+
+def encode_event(event_data, base_timestamp):
+    """Pack a single event into a record; raises ValueError if it cannot be represented"""
+    event_type = event_data.get('type')
+    type_id = EVENT_TYPE_IDS.get(event_type)
+    if type_id is None:
+        raise ValueError(f'Unknown event type: {event_type}')
+
+    modifiers = 0
+    for field, flag in MODIFIER_FLAGS:
+        if event_data.get(field):
+            modifiers |= flag
+    if event_data.get('isDragging'):
+        modifiers |= MOD_DRAGGING
+
+    a = b = key = 0
+    code = 0
+    if event_type == 'mousemove':
+        a, b = event_data.get('movementX', 0), event_data.get('movementY', 0)
+    elif event_type == 'wheel':
+        a, b = event_data.get('deltaX', 0), event_data.get('deltaY', 0)
+    elif event_type in ('mousedown', 'mouseup'):
+        a = event_data.get('button', 0)
+    else:
+        key_name = event_data.get('key', '')
+        key = KEY_IDS.get(key_name)
+        if key is None:
+            if len(key_name) != 1 or ord(key_name) > 0xFFFF:
+                raise ValueError(f'Key not representable: {key_name!r}')
+            key = ord(key_name)
+            modifiers |= MOD_CHAR
+        code = CODE_IDS.get(event_data.get('code', ''), 0)
+
+    offset = int(event_data.get('timestamp', base_timestamp)) - base_timestamp
+    if not 0 <= offset <= 0xFFFF:
+        raise ValueError(f'Timestamp offset out of range: {offset}')
+
+    return RECORD.pack(
+        type_id, modifiers, code,
+        _clamp(a), _clamp(b), _clamp(event_data.get('x', 0)), _clamp(event_data.get('y', 0)),
+        key, offset,
+    )
+
+
+def encode_events(events, base_timestamp=None):
+    """Pack a batch of events into one frame"""
+    if len(events) > MAX_BATCH:
+        raise ValueError(f'Too many events in one frame: {len(events)}')
+    if base_timestamp is None:
+        base_timestamp = min((int(e.get('timestamp', 0)) for e in events), default=0)
+    header = HEADER.pack(PROTOCOL_VERSION, 0, len(events), base_timestamp)
+    return header + b''.join(encode_event(e, base_timestamp) for e in events)
+
+
+def _decode_record(record, base_timestamp):
+    type_id, modifiers, code, a, b, x, y, key, offset = record
+    try:
+        event_type = EVENT_TYPES[type_id]
+    except IndexError:
+        raise ProtocolError(f'Unknown event type id: {type_id}') from None
+
+    event = BinaryEvent()
+    event.type = event_type
+    event.timestamp = base_timestamp + offset
+    if type_id <= 2:
+        event.x = x
+        event.y = y
+        if type_id == 0:
+            event.movementX = a
+            event.movementY = b
+            event.isDragging = bool(modifiers & MOD_DRAGGING)
+        else:
+            event.button = a
+    elif type_id == 3:
+        event.deltaX = a
+        event.deltaY = b
+    else:
+        if modifiers & MOD_CHAR:
+            event.key = chr(key)
+        elif key < len(KEY_NAMES):
+            event.key = KEY_NAMES[key]
+        else:
+            raise ProtocolError(f'Unknown key index: {key}')
+        event.code = CODE_NAMES[code] if code < len(CODE_NAMES) else ''
+        event.ctrlKey = bool(modifiers & MOD_CTRL)
+        event.shiftKey = bool(modifiers & MOD_SHIFT)
+        event.altKey = bool(modifiers & MOD_ALT)
+        event.metaKey = bool(modifiers & MOD_META)
+    return event
+
+
+def iter_decode(frame):
+    """Yield BinaryEvent objects from a frame (bytes, bytearray or memoryview)"""
+    view = memoryview(frame)
+    if len(view) < HEADER.size:
+        raise ProtocolError(f'Frame too short: {len(view)} bytes')
+    version, _flags, count, base_timestamp = HEADER.unpack_from(view)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f'Unsupported protocol version: {version}')
+    end = HEADER.size + count * RECORD.size
+    if len(view) != end:
+        raise ProtocolError(f'Frame length {len(view)} does not match {count} records')
+    for record in RECORD.iter_unpack(view[HEADER.size:end]):
+        yield _decode_record(record, base_timestamp)
+
+
+def decode_events(frame):
+    """Decode a whole frame into a list of events"""
+    return list(iter_decode(frame))
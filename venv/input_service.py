@@ -0,0 +1,341 @@
+import sys
+
+import server_backend
+
+# Select the backend (and monkey patch for eventlet/gevent) before anything else is imported
+server_options = server_backend.configure(sys.argv[1:] if __name__ == "__main__" else None)
+
+from flask import Flask, request
+from flask_socketio import SocketIO, join_room, leave_room
+import logging
+import os
+import threading
+import time
+
+from injectors import open_injector
+from input_handler import InputHandler
+from input_metrics import InputMetrics
+from input_protocol import PROTOCOL_VERSION, ProtocolError, iter_decode
+from server_backend import BACKENDS, NativeExecutor
+from session_recording import SessionRecorder
+from text_transfer import TextTransferError, TextTransferManager
+
+
+
+
+# Configure logging
+# Per-event logs are DEBUG and only formatted when enabled (INPUT_LOG_LEVEL=DEBUG)
+logging.basicConfig(level=os.environ.get("INPUT_LOG_LEVEL", "INFO").upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+metrics = InputMetrics()
+
+app = Flask(__name__)
+# Handlers only enqueue, so run them inline: with async_handlers each message gets its own
+# thread and a client's mousedown/mouseup or keydown/keyup could be queued out of order
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=BACKENDS[server_options.backend],
+                    async_handlers=False)
+
+# All OS injection runs serialized on one native thread, whatever the network backend
+injection_executor = NativeExecutor(server_options.backend)
+
+# Initialize the OS injector (--injector / INPUT_INJECTOR: pynput, recording, null)
+injector = open_injector(server_options.injector)
+
+# Injection pipeline settings (set INPUT_MAX_RATE to the host display refresh rate, 0 = unlimited)
+INPUT_MAX_RATE = float(os.environ.get("INPUT_MAX_RATE", 60))
+INPUT_QUEUE_SIZE = int(os.environ.get("INPUT_QUEUE_SIZE", 256))
+
+# Set INPUT_EXECUTE=0 to only log received events without touching the OS
+EXECUTE_INPUTS = os.environ.get("INPUT_EXECUTE", "1") != "0"
+
+# Bulk text transfers (see text_transfer.py): typing speed in characters/s, characters per
+# injector call, characters per client chunk, and the largest accepted text
+TEXT_TYPE_RATE = float(os.environ.get("TEXT_TYPE_RATE", 200))
+TEXT_TYPE_BATCH = int(os.environ.get("TEXT_TYPE_BATCH", 16))
+TEXT_CHUNK_SIZE = int(os.environ.get("TEXT_CHUNK_SIZE", 8192))
+TEXT_MAX_LENGTH = int(os.environ.get("TEXT_MAX_LENGTH", 1_000_000))
+
+try:
+    from frame_hub import SCREEN_ROOM, FrameHub
+    from screen_capture import open_capture_source
+    SCREEN_CAPTURE_AVAILABLE = True
+except ImportError:
+    SCREEN_CAPTURE_AVAILABLE = False
+    print("NumPy not installed, screen streaming disabled. Install with: pip install numpy")
+
+# Screen streaming settings
+SCREEN_CAPTURE_SOURCE = os.environ.get("SCREEN_CAPTURE_SOURCE", "auto")  # auto, mss, pil, test
+SCREEN_MIN_FPS = float(os.environ.get("SCREEN_MIN_FPS", 2))
+SCREEN_MAX_FPS = float(os.environ.get("SCREEN_MAX_FPS", 30))
+SCREEN_TILE_SIZE = int(os.environ.get("SCREEN_TILE_SIZE", 64))
+
+
+class InputSessionManager:
+    """Owns one long-lived InputHandler per connected client, keyed by Socket.IO sid"""
+    
+    def __init__(self, execute_inputs=EXECUTE_INPUTS, record_dir=None):
+        self.execute_inputs = execute_inputs
+        self.record_dir = record_dir
+        self.sessions = {}
+        self._lock = threading.Lock()
+    
+    def get(self, sid):
+        """Return the handler for a client, creating it on first use"""
+        input_handler = self.sessions.get(sid)
+        if input_handler is None:
+            with self._lock:
+                input_handler = self.sessions.get(sid)
+                if input_handler is None:
+                    input_handler = self.sessions[sid] = InputHandler(
+                        injector,
+                        execute_inputs=self.execute_inputs,
+                        max_rate=INPUT_MAX_RATE,
+                        queue_size=INPUT_QUEUE_SIZE,
+                        metrics=metrics,
+                        run_blocking=injection_executor.run,
+                        recorder=SessionRecorder.for_session(self.record_dir, sid) if self.record_dir else None,
+                        text_transfers=TextTransferManager(
+                            injector,
+                            run_blocking=injection_executor.run,
+                            notify=lambda event, payload, sid=sid: socketio.emit(event, payload, to=sid),
+                            metrics=metrics,
+                            execute=self.execute_inputs,
+                            type_rate=TEXT_TYPE_RATE,
+                            batch_size=TEXT_TYPE_BATCH,
+                            chunk_size=TEXT_CHUNK_SIZE,
+                            max_length=TEXT_MAX_LENGTH,
+                        ),
+                    )
+        return input_handler
+    
+    def close(self, sid):
+        """Flush a client's queued events and release anything it left pressed"""
+        with self._lock:
+            input_handler = self.sessions.pop(sid, None)
+        if input_handler is None:
+            return
+        input_handler.close()
+        injection_executor.run(input_handler.release_all)
+    
+    def close_all(self):
+        """Close every session (used on shutdown)"""
+        for sid in list(self.sessions):
+            self.close(sid)
+    
+    def __len__(self):
+        return len(self.sessions)
+
+
+sessions = InputSessionManager(record_dir=server_options.record_dir)
+
+metrics.add_gauge('input_sessions', 'Connected input clients', lambda: len(sessions))
+metrics.add_gauge(
+    'input_queue_depth', 'Events waiting in all injection queues',
+    lambda: sum(h.pipeline.get_stats()['queue_depth'] for h in list(sessions.sessions.values())),
+)
+
+# --- WebSocket Event Handlers ---
+@socketio.on("connect")
+def handle_connect(auth=None):
+    """Handle client connection and negotiate the input wire protocol"""
+    input_handler = sessions.get(request.sid)
+    offered = (auth or {}).get("protocols", []) if isinstance(auth, dict) else []
+    if PROTOCOL_VERSION in offered:
+        input_handler.protocol_version = PROTOCOL_VERSION
+    socketio.emit("protocol", {"binary": input_handler.protocol_version}, to=request.sid)
+    logger.info(f"Client connected ({len(sessions)} active, protocol {input_handler.protocol_version or 'json'})")
+
+screen_hub = None
+
+
+def get_screen_hub():
+    """Create the frame hub on first use (opening a capture source can be slow)"""
+    global screen_hub
+    if screen_hub is None:
+        capture_executor = NativeExecutor(server_options.backend, name="screen-capture")
+        source = capture_executor.run(open_capture_source, SCREEN_CAPTURE_SOURCE)
+        screen_hub = FrameHub(
+            source,
+            emit=lambda sid, messages, on_ack: socketio.emit("frame", messages, to=sid, callback=on_ack),
+            run_blocking=capture_executor.run,
+            spawn=socketio.start_background_task,
+            sleep=socketio.sleep,
+            tile_size=SCREEN_TILE_SIZE,
+            min_fps=SCREEN_MIN_FPS,
+            max_fps=SCREEN_MAX_FPS,
+        )
+        logger.info(f"Screen streaming from {source.name} source at {source.size()}")
+    return screen_hub
+
+@socketio.on("disconnect")
+def handle_disconnect(reason=None):
+    """Release the client's session (Flask-SocketIO >= 5.5 passes the disconnect reason)"""
+    sessions.close(request.sid)
+    if screen_hub:
+        screen_hub.unsubscribe(request.sid)
+    logger.info(f"Client disconnected ({len(sessions)} active)")
+
+@socketio.on("event")
+def handle_event(event_data):
+    """Queue one JSON input event; the ack (if requested) says whether it was accepted"""
+    input_handler = sessions.get(request.sid)
+    event_type = event_data.get('type')
+    try:
+       queued = input_handler.submit(event_data, time.monotonic())
+       if logger.isEnabledFor(logging.DEBUG):
+           logger.debug(f"Event queued: {event_data}")
+       return queued
+    except Exception as e:
+        logger.error(f"Error handling {event_type} event: {e}")
+        return False
+
+@socketio.on("events")
+def handle_binary_events(frame):
+    """Handle a batch of binary-encoded input events (see input_protocol.py)"""
+    input_handler = sessions.get(request.sid)
+    if not isinstance(frame, (bytes, bytearray, memoryview)):
+        logger.warning("Invalid binary event frame")
+        return
+    received_at = time.monotonic()
+    try:
+        for event_data in iter_decode(frame):
+            input_handler.submit(event_data, received_at)
+    except ProtocolError as e:
+        logger.error(f"Bad binary event frame: {e}")
+        socketio.emit("error", {"message": f"Bad binary event frame: {e}"}, to=request.sid)
+
+def text_request(action, data):
+    """Run a bulk text request for this client; errors are returned in the ack"""
+    if not isinstance(data, dict):
+        logger.warning("Invalid text transfer data format")
+        return {"ok": False, "error": "Invalid data format"}
+    transfers = sessions.get(request.sid).text_transfers
+    try:
+        return action(transfers)
+    except TextTransferError as e:
+        logger.warning(f"Text transfer {data.get('id')} rejected: {e}")
+        return {"ok": False, "id": data.get("id"), "error": str(e)}
+
+@socketio.on("text_begin")
+def handle_text_begin(data):
+    """Start a chunked text/clipboard transfer (modes: type, paste, clipboard)"""
+    return text_request(lambda t: t.begin(data.get("id"), data.get("mode", "type"), data.get("length")), data)
+
+@socketio.on("text_chunk")
+def handle_text_chunk(data):
+    """Receive the next chunk of a text transfer; the ack carries the client's credit"""
+    return text_request(lambda t: t.add_chunk(data.get("id"), data.get("seq"), data.get("data")), data)
+
+@socketio.on("text_end")
+def handle_text_end(data):
+    """Finish a text transfer"""
+    return text_request(lambda t: t.end(data.get("id")), data)
+
+@socketio.on("text_cancel")
+def handle_text_cancel(data):
+    """Cancel a text transfer"""
+    return text_request(lambda t: t.cancel(data.get("id")), data)
+
+@socketio.on("type")
+def handle_type_text(data):
+    """Type a short text in one message, through the same batched transfer path"""
+    text = data.get("text") if isinstance(data, dict) else None
+    if not isinstance(text, str):
+        logger.warning("No text specified in type data")
+        socketio.emit("error", {"message": "No text specified"}, to=request.sid)
+        return
+    return text_request(lambda t: {"ok": True, "id": t.send(text, data.get("mode", "type"))}, data)
+
+@socketio.on("screen_subscribe")
+def handle_screen_subscribe(_data=None):
+    """Start streaming screen frames (binary "frame" messages, acked by the client)"""
+    if not SCREEN_CAPTURE_AVAILABLE:
+        socketio.emit("error", {"message": "Screen streaming is not available"}, to=request.sid)
+        return
+    hub = get_screen_hub()
+    join_room(SCREEN_ROOM)
+    hub.subscribe(request.sid)
+    socketio.emit("screen_viewers", {"count": len(hub.subscribers)}, to=SCREEN_ROOM)
+
+@socketio.on("screen_unsubscribe")
+def handle_screen_unsubscribe(_data=None):
+    """Stop streaming screen frames to this client"""
+    if screen_hub:
+        screen_hub.unsubscribe(request.sid)
+        leave_room(SCREEN_ROOM)
+        socketio.emit("screen_viewers", {"count": len(screen_hub.subscribers)}, to=SCREEN_ROOM)
+
+@socketio.on("stats")
+def handle_stats(_data=None):
+    """Return service-wide metrics and this client's handler stats as the ack"""
+    stats = {"service": metrics.snapshot(), "session": sessions.get(request.sid).get_stats()}
+    if screen_hub:
+        stats["screen"] = screen_hub.get_stats()
+    return stats
+
+
+# --- Error Handlers ---
+@socketio.on_error_default
+def default_error_handler(e):
+    """Handle WebSocket errors"""
+    logger.error(f"WebSocket error: {e}")
+
+# --- Health Check Route ---
+@app.route("/health")
+def health_check():
+    """Simple health check endpoint"""
+    return {"status": "healthy", "service": "input-service"}, 200
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Input path metrics in Prometheus text format"""
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@app.route("/keys")
+def list_supported_keys():
+    """Return all supported key mappings for debugging"""
+    try:
+        from key_mapping import supported_keys
+    except ImportError as e:
+        # key_mapping needs pynput, which cannot load on a host without a display
+        return {"error": f"Key mapping is not available: {e}"}, 503
+    special_keys = supported_keys()
+    
+    return {
+        "supported_keys": special_keys,
+        "note": "All keys are case-insensitive. Single characters and text strings are also supported.",
+        "examples": {
+            "arrow_keys": ["Up", "down", "LEFT", "right", "ArrowUp", "arrow_down"],
+            "modifiers": ["ctrl", "shift", "alt", "cmd"],
+            "combinations": "Send keydown events with modifier flags: {'type': 'keydown', 'key': 'c', 'ctrlKey': True}",
+            "text": "Use the type event ({'text': ...}) or text_begin/text_chunk/text_end for long text"
+        }
+    }, 200
+
+# --- Main Server ---
+if __name__ == "__main__":
+    try:
+        logger.info(f"🎮 Input Service starting ({server_options.backend} backend)...")
+        logger.info(f"📡 WebSocket server: ws://localhost:{server_options.port}")
+        logger.info(f"🔗 Health check: http://localhost:{server_options.port}/health")
+        
+        run_options = {}
+        if server_options.backend == "threading":
+            run_options["allow_unsafe_werkzeug"] = True  # For development only
+        socketio.run(
+            app, 
+            host=server_options.host, 
+            port=server_options.port,
+            debug=False,  # Set to True for development
+            **run_options
+        )
+    except Exception as e:
+        logger.error(f"Failed to start server: {e}")
+    except KeyboardInterrupt:
+        logger.info("Server stopped by user")
+    finally:
+        sessions.close_all()
+        injection_executor.shutdown()
+        if screen_hub:
+            screen_hub.stop()
@@ -0,0 +1,135 @@
+from pynput.keyboard import Key
+from pynput.mouse import Button
+
+# Case-insensitive key names accepted by the service -> pynput Key attribute
+KEY_ALIASES = {
+    # Backspace variations
+    "backspace": "backspace",
+    "back": "backspace",
+
+    # Delete variations
+    "delete": "delete",
+    "del": "delete",
+
+    # Enter variations
+    "enter": "enter",
+    "return": "enter",
+    "ret": "enter",
+
+    # Tab variations
+    "tab": "tab",
+
+    # Space variations
+    "space": "space",
+    "spacebar": "space",
+    " ": "space",
+
+    # Escape variations
+    "escape": "esc",
+    "esc": "esc",
+
+    # Arrow keys - all possible variations
+    "arrowup": "up", "arrow_up": "up", "up": "up", "uparrow": "up",
+    "arrowdown": "down", "arrow_down": "down", "down": "down", "downarrow": "down",
+    "arrowleft": "left", "arrow_left": "left", "left": "left", "leftarrow": "left",
+    "arrowright": "right", "arrow_right": "right", "right": "right", "rightarrow": "right",
+
+    # Modifier keys
+    "shift": "shift", "shiftleft": "shift_l", "shift_left": "shift_l", "shiftright": "shift_r", "shift_right": "shift_r",
+    "ctrl": "ctrl", "control": "ctrl", "ctrlleft": "ctrl_l", "ctrl_left": "ctrl_l", "ctrlright": "ctrl_r", "ctrl_right": "ctrl_r",
+    "alt": "alt", "altleft": "alt_l", "alt_left": "alt_l", "altright": "alt_r", "alt_right": "alt_r", "altgr": "alt_gr",
+    "cmd": "cmd", "command": "cmd", "meta": "cmd", "windows": "cmd", "win": "cmd", "super": "cmd",
+
+    # Lock keys
+    "capslock": "caps_lock", "caps_lock": "caps_lock", "caps": "caps_lock",
+    "numlock": "num_lock", "num_lock": "num_lock",
+    "scrolllock": "scroll_lock", "scroll_lock": "scroll_lock",
+
+    # Navigation keys
+    "home": "home", "end": "end",
+    "pageup": "page_up", "page_up": "page_up", "pgup": "page_up",
+    "pagedown": "page_down", "page_down": "page_down", "pgdn": "page_down",
+
+    # Insert/Print Screen
+    "insert": "insert", "ins": "insert",
+    "printscreen": "print_screen", "print_screen": "print_screen", "prtsc": "print_screen",
+
+    # Menu key
+    "menu": "menu", "context": "menu", "contextmenu": "menu",
+
+    # Pause/Break
+    "pause": "pause", "break": "pause",
+}
+
+# Function keys
+KEY_ALIASES.update({f"f{n}": f"f{n}" for n in range(1, 25)})
+
+# Browser KeyboardEvent.code values that carry more detail than KeyboardEvent.key
+# (left/right modifiers, keys whose ``key`` depends on the layout or lock state)
+DOM_CODES = {
+    "ShiftLeft": "shift_l", "ShiftRight": "shift_r",
+    "ControlLeft": "ctrl_l", "ControlRight": "ctrl_r",
+    "AltLeft": "alt_l", "AltRight": "alt_r",
+    "MetaLeft": "cmd_l", "MetaRight": "cmd_r",
+    "OSLeft": "cmd_l", "OSRight": "cmd_r",
+    "Space": "space", "Enter": "enter", "NumpadEnter": "enter",
+    "Tab": "tab", "Backspace": "backspace", "Delete": "delete", "Escape": "esc",
+    "ArrowUp": "up", "ArrowDown": "down", "ArrowLeft": "left", "ArrowRight": "right",
+    "Home": "home", "End": "end", "PageUp": "page_up", "PageDown": "page_down",
+    "Insert": "insert", "PrintScreen": "print_screen", "ContextMenu": "menu", "Pause": "pause",
+    "CapsLock": "caps_lock", "NumLock": "num_lock", "ScrollLock": "scroll_lock",
+}
+DOM_CODES.update({f"F{n}": f"f{n}" for n in range(1, 25)})
+
+# Browser KeyboardEvent.key values for non-character keys
+DOM_KEYS = {
+    " ": "space", "Enter": "enter", "Escape": "esc", "Backspace": "backspace",
+    "Tab": "tab", "Delete": "delete",
+    "ArrowUp": "up", "ArrowDown": "down", "ArrowLeft": "left", "ArrowRight": "right",
+    "Home": "home", "End": "end", "PageUp": "page_up", "PageDown": "page_down",
+    "Control": "ctrl", "Shift": "shift", "Alt": "alt", "AltGraph": "alt_gr", "Meta": "cmd", "OS": "cmd",
+    "CapsLock": "caps_lock", "NumLock": "num_lock", "ScrollLock": "scroll_lock",
+    "Insert": "insert", "PrintScreen": "print_screen", "ContextMenu": "menu", "Pause": "pause",
+}
+DOM_KEYS.update({f"F{n}": f"f{n}" for n in range(1, 25)})
+
+
+def _compile(*tables):
+    """Resolve Key attribute names once, skipping keys this platform's pynput lacks"""
+    compiled = {}
+    for table in tables:
+        for name, attr in table.items():
+            key = getattr(Key, attr, None)
+            if key is not None:
+                compiled.setdefault(name, key)
+    return compiled
+
+
+# Built once at import: DOM names first, then lowercase aliases
+KEY_TABLE = _compile(DOM_CODES, DOM_KEYS, KEY_ALIASES)
+CODE_TABLE = _compile(DOM_CODES)
+
+MOUSE_BUTTONS = {
+    0: Button.left,
+    1: Button.middle,
+    2: Button.right,
+}
+
+
+def resolve_key(key, code=None):
+    """Translate a browser key/code pair to a pynput key, or None if unsupported"""
+    if code:
+        pynput_key = CODE_TABLE.get(code)
+        if pynput_key is not None:
+            return pynput_key
+    pynput_key = KEY_TABLE.get(key)
+    if pynput_key is not None:
+        return pynput_key
+    if len(key) == 1:
+        return key
+    return KEY_TABLE.get(key.lower())
+
+
+def supported_keys():
+    """Alias -> pynput name for every alias available on this platform"""
+    return {alias: f"Key.{attr}" for alias, attr in KEY_ALIASES.items() if hasattr(Key, attr)}
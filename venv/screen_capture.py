@@ -0,0 +1,244 @@
+"""Screen capture sources and the tiled frame encoding.
+
+Frames are captured into a preallocated RGB buffer, split into square tiles and
+each tile is hashed (CRC32) so only changed tiles need to be compressed and
+sent (see frame_hub.py for the fan-out to viewers).
+
+Frame message (little endian)::
+
+    header  <BBIHHHH  version, flags (FLAG_KEYFRAME), sequence, width, height,
+                      tile size, tile count
+    tile    <HHHHI    x, y, width, height, compressed length
+            followed by zlib-compressed RGB rows of that tile
+"""
+import logging
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct('<BBIHHHH')
+TILE_HEADER = struct.Struct('<HHHHI')
+FLAG_KEYFRAME = 0x01
+
+DEFAULT_TILE_SIZE = 64
+
+
+class CaptureSizeChanged(Exception):
+    """The source resolution no longer matches the capture buffer"""
+
+
+class CaptureSource:
+    """Fills a preallocated (height, width, 3) uint8 RGB array with the current screen"""
+
+    name = 'base'
+
+    def size(self):
+        """Return (width, height)"""
+        raise NotImplementedError
+
+    def grab(self, out):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class TestPatternSource(CaptureSource):
+    """Synthetic source for headless testing: static gradient plus a moving block"""
+
+    name = 'test'
+
+    def __init__(self, width=640, height=360, block=48, step=8):
+        self.width = width
+        self.height = height
+        self.block = block
+        self.step = step
+        self.frame = 0
+        ys, xs = np.mgrid[0:height, 0:width]
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[..., 0] = xs * 255 // max(width - 1, 1)
+        self.background[..., 1] = ys * 255 // max(height - 1, 1)
+        self.background[..., 2] = 128
+
+    def size(self):
+        return self.width, self.height
+
+    def grab(self, out):
+        np.copyto(out, self.background)
+        x = (self.frame * self.step) % max(self.width - self.block, 1)
+        y = (self.height - self.block) // 2
+        out[y:y + self.block, x:x + self.block] = (255, 255, 255)
+        self.frame += 1
+
+
+class PILCaptureSource(CaptureSource):
+    """PIL ImageGrab (what pyscreeze uses); works on macOS, Windows and X11"""
+
+    name = 'pil'
+
+    def __init__(self):
+        from PIL import ImageGrab
+        self._grab = ImageGrab.grab
+        self._size = self._grab().size
+
+    def size(self):
+        return self._size
+
+    def grab(self, out):
+        image = self._grab()
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if image.size != self._size:
+            self._size = image.size
+            raise CaptureSizeChanged(image.size)
+        np.copyto(out, np.asarray(image))
+
+
+class MSSCaptureSource(CaptureSource):
+    """mss native grabber (XGetImage/XShm on X11, CoreGraphics, GDI); fastest when installed"""
+
+    name = 'mss'
+
+    def __init__(self, monitor=1):
+        import mss
+        self._mss = mss
+        self._monitor_index = monitor
+        # mss handles are bound to the thread that created them, so open lazily on
+        # the capture thread
+        self._local = threading.local()
+        with mss.mss() as sct:
+            monitor_info = sct.monitors[monitor]
+        self._size = (monitor_info['width'], monitor_info['height'])
+
+    def _sct(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._local.sct = self._mss.mss()
+        return sct
+
+    def size(self):
+        return self._size
+
+    def grab(self, out):
+        sct = self._sct()
+        shot = sct.grab(sct.monitors[self._monitor_index])
+        if shot.size != self._size:
+            self._size = tuple(shot.size)
+            raise CaptureSizeChanged(shot.size)
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        np.copyto(out, bgra[..., 2::-1])
+
+    def close(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None:
+            sct.close()
+
+
+CAPTURE_SOURCES = {
+    'mss': MSSCaptureSource,
+    'pil': PILCaptureSource,
+    'test': TestPatternSource,
+}
+
+
+def open_capture_source(name='auto'):
+    """Create a capture source by name; 'auto' tries mss, then PIL, then the test pattern"""
+    if name != 'auto':
+        return CAPTURE_SOURCES[name]()
+    for candidate in ('mss', 'pil'):
+        try:
+            return CAPTURE_SOURCES[candidate]()
+        except Exception as e:
+            logger.info(f"Capture source {candidate} unavailable: {e}")
+    logger.warning("No screen capture available, streaming a test pattern")
+    return TestPatternSource()
+
+
+class TiledFrame:
+    """Capture buffer, per-tile hashes and a cache of compressed tiles.
+
+    All arrays are allocated once per resolution and reused between frames.
+    """
+
+    def __init__(self, width, height, tile_size=DEFAULT_TILE_SIZE, compress_level=1):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.compress_level = compress_level
+        self.cols = -(-width // tile_size)
+        self.rows = -(-height // tile_size)
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        self.hashes = np.zeros(self.rows * self.cols, dtype=np.uint32)
+        self.tiles = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                x, y = col * tile_size, row * tile_size
+                self.tiles.append((x, y, min(tile_size, width - x), min(tile_size, height - y)))
+        self.all_tiles = range(len(self.tiles))
+        # One contiguous scratch buffer per distinct tile shape (full, right edge, bottom edge, corner)
+        self._scratch = {}
+        for _x, _y, w, h in self.tiles:
+            if (w, h) not in self._scratch:
+                self._scratch[(w, h)] = np.empty((h, w, 3), dtype=np.uint8)
+        self._compressed = {}
+
+    def _tile_bytes(self, index):
+        x, y, w, h = self.tiles[index]
+        scratch = self._scratch[(w, h)]
+        np.copyto(scratch, self.pixels[y:y + h, x:x + w])
+        return scratch
+
+    def rehash(self):
+        """Hash every tile of ``pixels``; returns the indices of tiles that changed"""
+        changed = []
+        hashes = self.hashes
+        crc32 = zlib.crc32
+        for index in self.all_tiles:
+            value = crc32(self._tile_bytes(index))
+            if value != hashes[index]:
+                hashes[index] = value
+                self._compressed.pop(index, None)
+                changed.append(index)
+        return changed
+
+    def compressed_tile(self, index):
+        data = self._compressed.get(index)
+        if data is None:
+            data = self._compressed[index] = zlib.compress(self._tile_bytes(index), self.compress_level)
+        return data
+
+    def encode(self, indices, sequence, keyframe=False):
+        """Build a frame message carrying the given tiles"""
+        parts = [FRAME_HEADER.pack(
+            FRAME_VERSION, FLAG_KEYFRAME if keyframe else 0, sequence & 0xFFFFFFFF,
+            self.width, self.height, self.tile_size, len(indices),
+        )]
+        for index in indices:
+            x, y, w, h = self.tiles[index]
+            data = self.compressed_tile(index)
+            parts.append(TILE_HEADER.pack(x, y, w, h, len(data)))
+            parts.append(data)
+        return b''.join(parts)
+
+
+def decode_frame(message, pixels=None):
+    """Apply a frame message to an RGB array (allocated on keyframes); returns the array"""
+    view = memoryview(message)
+    version, flags, _sequence, width, height, _tile_size, count = FRAME_HEADER.unpack_from(view)
+    if version != FRAME_VERSION:
+        raise ValueError(f'Unsupported frame version: {version}')
+    if pixels is None or pixels.shape != (height, width, 3):
+        pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    offset = FRAME_HEADER.size
+    for _ in range(count):
+        x, y, w, h, length = TILE_HEADER.unpack_from(view, offset)
+        offset += TILE_HEADER.size
+        tile = np.frombuffer(zlib.decompress(view[offset:offset + length]), dtype=np.uint8)
+        pixels[y:y + h, x:x + w] = tile.reshape(h, w, 3)
+        offset += length
+    return pixels
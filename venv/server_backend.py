@@ -0,0 +1,126 @@
+"""Server backend selection for the input service.
+
+``configure()`` must run before Flask/Socket.IO are imported so that eventlet or
+gevent can monkey patch the standard library first.
+"""
+import argparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# backend name -> Flask-SocketIO async_mode
+BACKENDS = {
+    "threading": "threading",  # Werkzeug dev server, one OS thread per request
+    "eventlet": "eventlet",
+    "gevent": "gevent",
+}
+DEFAULT_BACKEND = "threading"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Remote desktop input service")
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default=os.environ.get("INPUT_SERVER_BACKEND", DEFAULT_BACKEND),
+        help="server backend (default: $INPUT_SERVER_BACKEND or %(default)s)",
+    )
+    parser.add_argument("--host", default=os.environ.get("INPUT_SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("INPUT_SERVER_PORT", 5001)))
+    parser.add_argument(
+        "--injector",
+        choices=("pynput", "recording", "null"),
+        default=os.environ.get("INPUT_INJECTOR", "pynput"),
+        help="OS injection backend; recording/null never touch the OS (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--record-dir",
+        default=os.environ.get("INPUT_RECORD_DIR") or None,
+        help="write each session's input events to a recording in this directory",
+    )
+    args, _unknown = parser.parse_known_args(argv)
+    return args
+
+
+def configure(argv=None):
+    """Pick the backend from argv/env and monkey patch for it; returns the parsed options"""
+    args = parse_args(argv if argv is not None else [])
+    if args.backend == "eventlet":
+        import eventlet
+        eventlet.monkey_patch()
+    elif args.backend == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+    return args
+
+
+class _Job:
+    __slots__ = ("fn", "args", "done", "result", "error")
+
+    def __init__(self, fn, args, done):
+        self.fn = fn
+        self.args = args
+        self.done = done
+        self.result = None
+        self.error = None
+
+
+class NativeExecutor:
+    """Runs blocking calls one at a time on a single, dedicated OS thread.
+
+    pynput (and screen capture) block inside native calls, so under eventlet/gevent
+    they must not run on the hub. Every backend pins the calls to one real thread
+    (a one-worker pool, or for eventlet an unpatched thread fed by an unpatched
+    queue) while the caller, green or native, waits cooperatively for the result.
+    """
+
+    def __init__(self, backend, name="input-inject"):
+        self.backend = backend
+        if backend == "eventlet":
+            from eventlet import patcher, tpool
+            real_threading = patcher.original("threading")
+            # The caller parks in tpool while the dedicated thread does the work
+            self._tpool = tpool
+            self._new_event = real_threading.Event
+            self._jobs = patcher.original("queue").SimpleQueue()
+            self._thread = real_threading.Thread(target=self._work, name=name, daemon=True)
+            self._thread.start()
+        elif backend == "gevent":
+            from gevent.threadpool import ThreadPool
+            self._pool = ThreadPool(1)
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                job.result = job.fn(*job.args)
+            except BaseException as e:
+                job.error = e
+            job.done.set()
+
+    def run(self, fn, *args):
+        """Call ``fn(*args)`` on the executor thread and return its result"""
+        if self.backend == "eventlet":
+            job = _Job(fn, args, self._new_event())
+            self._jobs.put(job)
+            self._tpool.execute(job.done.wait)
+            if job.error is not None:
+                raise job.error
+            return job.result
+        if self.backend == "gevent":
+            return self._pool.apply(fn, args)
+        return self._pool.submit(fn, *args).result()
+
+    def shutdown(self):
+        if self.backend == "eventlet":
+            self._jobs.put(None)
+        elif self.backend == "gevent":
+            self._pool.kill()
+        else:
+            self._pool.shutdown(wait=True)
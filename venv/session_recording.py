@@ -0,0 +1,182 @@
+"""Append-only input session recordings and their replay.
+
+File layout (little endian)::
+
+    header  b'RDREC' <BQ   format version, start time (ms since epoch)
+    record  <IBH           µs since the previous record, kind, payload length
+            payload        KIND_BINARY: one input_protocol record (16 bytes)
+                           KIND_JSON:   UTF-8 JSON of the event dict
+
+Events the binary protocol can represent take 23 bytes on disk; anything else
+falls back to JSON. Replaying feeds the events back through an InputHandler
+(queue, coalescing, rate limit, injector) so runs are reproducible without a
+display::
+
+    python session_recording.py replay recordings/session.rec --speed max --injector null
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+from input_protocol import HEADER, PROTOCOL_VERSION, RECORD, decode_events, encode_event
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RDREC'
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct('<BQ')
+RECORD_HEADER = struct.Struct('<IBH')
+KIND_BINARY = 0
+KIND_JSON = 1
+MAX_DELAY_US = 0xFFFFFFFF
+
+
+class RecordingError(ValueError):
+    """Raised for files that are not valid recordings"""
+
+
+class SessionRecorder:
+    """Writes the events of one session to an append-only file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab', buffering=64 * 1024)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC + FILE_HEADER.pack(FORMAT_VERSION, int(time.time() * 1000)))
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.events_written = 0
+
+    @classmethod
+    def for_session(cls, directory, sid):
+        """Open a new recording file for a Socket.IO session"""
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{sid}.rec"
+        return cls(os.path.join(directory, name))
+
+    def write(self, event_data):
+        try:
+            kind, payload = KIND_BINARY, encode_event(event_data, int(event_data.get('timestamp') or 0))
+        except (TypeError, ValueError):
+            kind, payload = KIND_JSON, json.dumps(dict(event_data), separators=(',', ':')).encode()
+        with self._lock:
+            if self._file.closed:
+                return
+            now = time.monotonic()
+            delay_us = min(int((now - self._last) * 1_000_000), MAX_DELAY_US)
+            self._last = now
+            self._file.write(RECORD_HEADER.pack(delay_us, kind, len(payload)))
+            self._file.write(payload)
+            self.events_written += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_recording(path):
+    """Yield (seconds since previous event, event) pairs from a recording"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    view = memoryview(data)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise RecordingError(f'{path} is not a session recording')
+    version, _started = FILE_HEADER.unpack_from(view, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise RecordingError(f'Unsupported recording version: {version}')
+
+    # A one-record binary frame header, reused for every binary record
+    frame_header = bytearray(HEADER.pack(PROTOCOL_VERSION, 0, 1, 0))
+    offset = len(MAGIC) + FILE_HEADER.size
+    while offset + RECORD_HEADER.size <= len(view):
+        delay_us, kind, length = RECORD_HEADER.unpack_from(view, offset)
+        offset += RECORD_HEADER.size
+        payload = view[offset:offset + length]
+        if len(payload) < length:
+            logger.warning(f"Truncated record at end of {path}")
+            return
+        offset += length
+        if kind == KIND_BINARY and length == RECORD.size:
+            (event,) = decode_events(bytes(frame_header) + payload)
+        elif kind == KIND_JSON:
+            event = json.loads(bytes(payload))
+        else:
+            raise RecordingError(f'Unknown record kind {kind} at offset {offset - length}')
+        yield delay_us / 1_000_000, event
+
+
+def replay(path, handler, speed=1.0, rate=None, sleep=time.sleep):
+    """Feed a recording through ``handler`` and return throughput/latency figures.
+
+    ``speed`` scales the recorded timing (1.0 = real time, 0 = as fast as
+    possible); ``rate`` replays at a fixed number of events per second instead.
+    The handler is closed (its queue flushed) before returning.
+    """
+    metrics = handler.metrics
+    started = time.monotonic()
+    due = 0.0
+    events = 0
+    for delay, event in read_recording(path):
+        if rate:
+            due += 1.0 / rate
+        elif speed:
+            due += delay / speed
+        wait = started + due - time.monotonic()
+        if wait > 0:
+            sleep(wait)
+        # Stamp as if sent now so client-delay figures stay meaningful
+        event['timestamp'] = int(time.time() * 1000)
+        handler.submit(event, time.monotonic())
+        events += 1
+    submitted = time.monotonic() - started
+    handler.close()
+    elapsed = time.monotonic() - started
+
+    stats = handler.get_stats()
+    return {
+        'events': events,
+        'submit_seconds': round(submitted, 4),
+        'total_seconds': round(elapsed, 4),
+        'events_per_second': round(events / elapsed, 1) if elapsed else None,
+        'events_injected': stats['events_injected'],
+        'events_coalesced': stats['events_coalesced'],
+        'events_dropped': stats['events_dropped'],
+        'latency_p50': metrics.inject_latency.quantile(0.5),
+        'latency_p99': metrics.inject_latency.quantile(0.99),
+        'latency_p999': metrics.inject_latency.quantile(0.999),
+    }
+
+
+def main(argv=None):
+    from injectors import INJECTORS, open_injector
+    from input_handler import InputHandler
+
+    parser = argparse.ArgumentParser(description='Replay a recorded input session')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    replay_parser = subparsers.add_parser('replay', help='feed a recording through the input pipeline')
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('--speed', default='1', help="timing multiplier, or 'max' for no delays")
+    replay_parser.add_argument('--rate', type=float, help='fixed events per second (overrides --speed)')
+    replay_parser.add_argument('--injector', choices=sorted(INJECTORS), default='null')
+    replay_parser.add_argument('--max-rate', type=float, default=60, help='pipeline mousemove rate limit (0 = off)')
+    dump_parser = subparsers.add_parser('dump', help='print the events of a recording as JSON lines')
+    dump_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'dump':
+        for delay, event in read_recording(args.path):
+            print(json.dumps({'delay': delay, 'event': dict(event)}))
+        return
+
+    speed = 0 if args.speed == 'max' else float(args.speed)
+    handler = InputHandler(open_injector(args.injector), execute_inputs=True, max_rate=args.max_rate)
+    print(json.dumps(replay(args.path, handler, speed=speed, rate=args.rate), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import time
+
+import numpy as np
+
+from frame_hub import FrameHub
+from screen_capture import FLAG_KEYFRAME, FRAME_HEADER, decode_frame
+from screen_capture import TestPatternSource as PatternSource  # not a test class
+
+
+class FakeViewer:
+    """Decodes what it is sent and acks only when told to"""
+
+    def __init__(self):
+        self.pixels = None
+        self.on_ack = None
+        self.keyframes = 0
+        self.messages = 0
+
+    def receive(self, messages, on_ack):
+        assert self.on_ack is None, 'sent a frame before the previous one was acked'
+        for message in messages:
+            if FRAME_HEADER.unpack_from(message)[1] & FLAG_KEYFRAME:
+                self.keyframes += 1
+            self.pixels = decode_frame(message, self.pixels)
+            self.messages += 1
+        self.on_ack = on_ack
+
+    def ack(self):
+        if self.on_ack:
+            on_ack, self.on_ack = self.on_ack, None
+            on_ack()
+
+
+def make_hub(ring_size=4, ack_timeout=2.0):
+    viewers = {}
+    hub = FrameHub(
+        PatternSource(96, 64, block=16, step=8),
+        emit=lambda sid, messages, on_ack: viewers[sid].receive(messages, on_ack),
+        spawn=lambda fn: None, tile_size=32, ring_size=ring_size, ack_timeout=ack_timeout,
+    )
+    return hub, viewers
+
+
+def join(hub, viewers, sid):
+    viewers[sid] = FakeViewer()
+    hub.subscribe(sid)
+    return viewers[sid]
+
+
+def assert_in_sync(hub, viewer):
+    np.testing.assert_array_equal(viewer.pixels, hub.frame.pixels)
+
+
+def test_prompt_viewer_gets_one_keyframe_then_deltas():
+    hub, viewers = make_hub()
+    viewer = join(hub, viewers, 'a')
+    for _ in range(10):
+        hub.tick()
+        viewer.ack()
+        assert_in_sync(hub, viewer)
+    assert viewer.keyframes == 1
+    assert hub.frames_encoded == 10
+
+
+def test_late_joiner_shares_the_cached_keyframe():
+    hub, viewers = make_hub()
+    first = join(hub, viewers, 'a')
+    for _ in range(5):
+        hub.tick()
+        first.ack()
+    second = join(hub, viewers, 'b')
+    third = join(hub, viewers, 'c')
+    hub.tick()
+
+    assert second.keyframes == third.keyframes == 1
+    assert hub.keyframes_encoded == 2  # the first viewer's, then one shared by both late joiners
+    for viewer in (first, second, third):
+        assert_in_sync(hub, viewer)
+
+
+def test_unacked_viewer_is_skipped_then_catches_up_from_the_ring():
+    hub, viewers = make_hub(ring_size=4)
+    viewer = join(hub, viewers, 'a')
+    hub.tick()
+    viewer.ack()
+    hub.tick()  # sent, not acked yet
+    hub.tick()
+    hub.tick()
+    assert hub.subscribers['a'].frames_skipped == 2
+
+    viewer.ack()
+    hub.tick()  # the two missed deltas plus the new one
+    assert viewer.keyframes == 1
+    assert_in_sync(hub, viewer)
+
+
+def test_viewer_behind_the_ring_is_resynchronised_with_a_keyframe():
+    hub, viewers = make_hub(ring_size=2)
+    slow = join(hub, viewers, 'slow')
+    hub.tick()
+    slow.ack()
+    hub.tick()  # in flight
+    for _ in range(5):
+        hub.tick()
+    slow.ack()
+    hub.tick()
+
+    assert slow.keyframes == 2
+    assert_in_sync(hub, slow)
+
+
+def test_lost_ack_times_out_into_a_keyframe():
+    hub, viewers = make_hub(ack_timeout=0.05)
+    viewer = join(hub, viewers, 'a')
+    hub.tick()
+    viewer.on_ack = None  # the ack never arrives
+    time.sleep(0.06)
+    hub.tick()
+
+    assert viewer.keyframes == 2
+    assert_in_sync(hub, viewer)
+
+
+def test_late_ack_does_not_release_the_resync_keyframe():
+    hub, viewers = make_hub(ack_timeout=0.05)
+    viewer = join(hub, viewers, 'a')
+    hub.tick()
+    late_ack, viewer.on_ack = viewer.on_ack, None
+    time.sleep(0.06)
+    hub.tick()  # timed out: resync keyframe is now in flight
+    late_ack()
+    hub.tick()
+
+    assert viewer.keyframes == 2
+    assert hub.subscribers['a'].frames_skipped == 1
+    viewer.ack()
+    hub.tick()
+    assert_in_sync(hub, viewer)
+
+
+def test_slow_viewer_does_not_hold_back_others():
+    hub, viewers = make_hub(ring_size=2)
+    fast = join(hub, viewers, 'fast')
+    slow = join(hub, viewers, 'slow')
+    for step in range(12):
+        hub.tick()
+        fast.ack()
+        if step % 4 == 3:
+            slow.ack()
+        assert_in_sync(hub, fast)
+    assert fast.keyframes == 1
+    assert hub.subscribers['slow'].frames_skipped > 0
@@ -0,0 +1,73 @@
+import pytest
+
+from injectors import RecordingInjector
+from input_handler import InputHandler
+
+
+@pytest.fixture
+def handler():
+    handler = InputHandler(RecordingInjector(), execute_inputs=True, max_rate=0)
+    yield handler
+    handler.close()
+
+
+def calls(handler):
+    return [(method, args) for _t, method, args in handler.injector.calls]
+
+
+def key(event_type, key, code, **flags):
+    return dict({'type': event_type, 'key': key, 'code': code}, **flags)
+
+
+@pytest.mark.parametrize('name,code,flag,letter,letter_code', [
+    ('Shift', 'ShiftRight', 'shiftKey', 'A', 'KeyA'),
+    ('Control', 'ControlRight', 'ctrlKey', 'c', 'KeyC'),
+])
+def test_right_modifier_is_not_pressed_twice(handler, name, code, flag, letter, letter_code):
+    handler.handle_event(key('keydown', name, code, **{flag: True}))
+    handler.handle_event(key('keydown', letter, letter_code, **{flag: True}))
+    handler.handle_event(key('keyup', letter, letter_code, **{flag: True}))
+    handler.handle_event(key('keyup', name, code))
+
+    assert calls(handler) == [
+        ('press_key', (name, code)),
+        ('press_key', (letter, letter_code)),
+        ('release_key', (letter, letter_code)),
+        ('release_key', (name, code)),
+    ]
+    assert not handler._held_keys
+
+
+def test_modifier_from_flag_only_is_released_after_the_key(handler):
+    # Shift went down before the page had focus, so only the flag says it is held
+    handler.handle_event(key('keydown', 'A', 'KeyA', shiftKey=True))
+    handler.handle_event(key('keyup', 'A', 'KeyA'))
+
+    assert calls(handler) == [
+        ('press_key', ('Shift', None)),
+        ('press_key', ('A', 'KeyA')),
+        ('release_key', ('Shift', None)),
+        ('release_key', ('A', 'KeyA')),
+    ]
+    assert not handler._held_keys
+
+
+class FailingInjector(RecordingInjector):
+    def press_key(self, key, code=None):
+        raise RuntimeError('no display')
+
+
+def test_failed_and_unknown_events_are_not_counted_as_injected():
+    handler = InputHandler(FailingInjector(), execute_inputs=True, max_rate=0)
+    handler.submit({'type': 'keydown', 'key': 'a', 'code': 'KeyA', 'timestamp': 1})
+    handler.submit({'type': 'bogus'})
+    handler.submit({'type': 'mousedown', 'button': 0, 'timestamp': 1})
+    handler.close()
+
+    stats = handler.get_stats()
+    assert (stats['events_injected'], stats['events_failed']) == (1, 2)
+    metrics = handler.metrics
+    assert metrics.events_injected.values == {'mousedown': 1}
+    assert metrics.injection_failures.values == {'keydown': 1}
+    assert metrics.inject_latency.series[None].count == 1
+    assert metrics.end_to_end.series[None].count == 1
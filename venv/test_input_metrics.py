@@ -0,0 +1,43 @@
+from input_metrics import Counter, InputMetrics
+
+
+def parse(text):
+    """Sample lines as {series: value}; fails if a line is not 'series value'"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        series, value = line.rsplit(' ', 1)
+        samples[series] = float(value)
+    return samples
+
+
+def test_unknown_event_types_share_one_series():
+    metrics = InputMetrics()
+    metrics.events_received.inc('mousemove')
+    for i in range(100):
+        metrics.events_received.inc(f'bogus-{i}')
+        metrics.handle_time.observe(0.001, f'bogus-{i}')
+
+    assert metrics.events_received.values == {'mousemove': 1, 'other': 100}
+    assert set(metrics.handle_time.series) == {'other'}
+
+
+def test_render_escapes_label_values():
+    counter = Counter('test_total', 'Test counter', label='name')
+    counter.inc('a"b\nc\\d')
+
+    lines = counter.render()
+    assert lines[-1] == 'test_total{name="a\\"b\\nc\\\\d"} 1'
+
+
+def test_render_is_valid_exposition_text():
+    metrics = InputMetrics()
+    metrics.events_received.inc('a"b\nc')
+    metrics.handle_time.observe(0.002, 'keydown')
+    metrics.inject_latency.observe(0.003)
+
+    samples = parse(metrics.render())
+    assert samples['input_events_received_total{type="other"}'] == 1
+    assert samples['input_handle_seconds_bucket{type="keydown",le="0.0025"}'] == 1
+    assert samples['input_receive_to_inject_seconds_count'] == 1
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from input_metrics import InputMetrics
+from input_pipeline import InjectionPipeline
+
+
+class BlockingDispatch:
+    """Records dispatched events; holds the worker on the first one until released"""
+
+    def __init__(self):
+        self.events = []
+        self.times = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, event_data):
+        self.started.set()
+        self.release.wait(5)
+        self.events.append(event_data)
+        self.times.append(time.monotonic())
+
+
+def blocked_pipeline(**kwargs):
+    """A pipeline whose worker is busy with a keydown, so later events stay queued"""
+    dispatch = BlockingDispatch()
+    pipeline = InjectionPipeline(dispatch, **kwargs)
+    pipeline.submit({'type': 'keydown', 'key': 'a'})
+    assert dispatch.started.wait(5)
+    return pipeline, dispatch
+
+
+def move(dx=1, dy=0, **extra):
+    return dict({'type': 'mousemove', 'movementX': dx, 'movementY': dy}, **extra)
+
+
+def test_queued_moves_are_coalesced():
+    pipeline, dispatch = blocked_pipeline(max_rate=0)
+    for _ in range(10):
+        pipeline.submit(move(1, 2))
+    dispatch.release.set()
+    pipeline.close()
+
+    assert [e['type'] for e in dispatch.events] == ['keydown', 'mousemove']
+    assert (dispatch.events[1]['movementX'], dispatch.events[1]['movementY']) == (10, 20)
+    assert pipeline.get_stats()['events_coalesced'] == 9
+
+
+def test_merged_move_keeps_oldest_timestamp():
+    pipeline, dispatch = blocked_pipeline(max_rate=0)
+    for i in range(5):
+        pipeline.submit(move(1, 0, x=i, timestamp=1000 + i))
+    dispatch.release.set()
+    pipeline.close()
+
+    merged = dispatch.events[1]
+    assert (merged['timestamp'], merged['x'], merged['movementX']) == (1000, 4, 5)
+
+
+def test_other_events_are_never_merged_or_reordered():
+    pipeline, dispatch = blocked_pipeline(max_rate=0)
+    for event in (move(), {'type': 'mousedown', 'button': 0}, move(), move(),
+                  {'type': 'wheel', 'deltaY': 100}, {'type': 'mouseup', 'button': 0}, move()):
+        pipeline.submit(event)
+    dispatch.release.set()
+    pipeline.close()
+
+    assert [e['type'] for e in dispatch.events] == [
+        'keydown', 'mousemove', 'mousedown', 'mousemove', 'wheel', 'mouseup', 'mousemove']
+    assert dispatch.events[3]['movementX'] == 2
+
+
+def test_rate_gate_spaces_moves():
+    dispatch = BlockingDispatch()
+    dispatch.release.set()
+    pipeline = InjectionPipeline(dispatch, max_rate=20)
+    pipeline.submit(move())
+    deadline = time.monotonic() + 5
+    while not dispatch.events and time.monotonic() < deadline:
+        time.sleep(0.001)
+    pipeline.submit(move())
+    while len(dispatch.events) < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    pipeline.close()
+
+    assert dispatch.times[1] - dispatch.times[0] >= 0.045
+
+
+def test_full_queue_drops_moves_and_times_out_others():
+    metrics = InputMetrics()
+    pipeline, dispatch = blocked_pipeline(max_rate=0, max_queue=2, put_timeout=0.05, metrics=metrics)
+    assert pipeline.submit({'type': 'mousedown', 'button': 0})
+    assert pipeline.submit({'type': 'mouseup', 'button': 0})
+    assert not pipeline.submit(move())
+    assert not pipeline.submit({'type': 'keyup', 'key': 'a'})
+    dispatch.release.set()
+    pipeline.close()
+
+    assert pipeline.get_stats()['events_dropped'] == 2
+    assert metrics.events_dropped.values == {'mousemove': 1, 'keyup': 1}
+    assert [e['type'] for e in dispatch.events] == ['keydown', 'mousedown', 'mouseup']
+
+
+def test_failed_dispatch_is_not_counted_as_injected():
+    metrics = InputMetrics()
+
+    def dispatch(event_data):
+        raise RuntimeError('no display')
+
+    pipeline = InjectionPipeline(dispatch, metrics=metrics)
+    pipeline.submit({'type': 'keydown', 'key': 'a'})
+    pipeline.close()
+
+    stats = pipeline.get_stats()
+    assert (stats['events_injected'], stats['events_failed']) == (0, 1)
+    assert metrics.events_injected.total() == 0
+    assert metrics.injection_failures.values == {'keydown': 1}
+
+
+def test_dispatch_reporting_failure_is_counted_once():
+    metrics = InputMetrics()
+    pipeline = InjectionPipeline(lambda event_data: False, metrics=metrics)
+    pipeline.submit({'type': 'keydown', 'key': 'a'})
+    pipeline.close()
+
+    assert pipeline.get_stats()['events_failed'] == 1
+    assert metrics.events_injected.total() == 0
+    # The dispatcher counted its own failure
+    assert metrics.injection_failures.total() == 0
@@ -0,0 +1,139 @@
+import struct
+
+import pytest
+
+from input_protocol import (
+    HEADER,
+    KEY_NAMES,
+    PROTOCOL_VERSION,
+    RECORD,
+    BinaryEvent,
+    ProtocolError,
+    decode_events,
+    encode_events,
+)
+
+BASE = 1_700_000_000_000
+
+
+def roundtrip(events):
+    return decode_events(encode_events(events))
+
+
+def test_record_sizes():
+    assert HEADER.size == 12
+    assert RECORD.size == 16
+    assert len(encode_events([{'type': 'wheel', 'timestamp': BASE}] * 3)) == 12 + 3 * 16
+
+
+def test_mousemove_roundtrip():
+    event = {'type': 'mousemove', 'x': 640, 'y': 480, 'movementX': -3, 'movementY': 7,
+             'isDragging': True, 'timestamp': BASE}
+    (decoded,) = roundtrip([event])
+    assert decoded == event
+
+
+def test_mouse_buttons_roundtrip():
+    events = [
+        {'type': 'mousedown', 'button': 2, 'x': 10, 'y': 20, 'timestamp': BASE},
+        {'type': 'mouseup', 'button': 2, 'x': 11, 'y': 21, 'timestamp': BASE + 90},
+    ]
+    assert roundtrip(events) == events
+
+
+def test_wheel_roundtrip_rounds_to_int16():
+    (decoded,) = roundtrip([{'type': 'wheel', 'deltaX': 0.4, 'deltaY': -100.6, 'timestamp': BASE}])
+    assert decoded['deltaX'] == 0
+    assert decoded['deltaY'] == -101
+
+
+def test_deltas_are_clamped():
+    (decoded,) = roundtrip([{'type': 'mousemove', 'movementX': 100000, 'movementY': -100000, 'timestamp': BASE}])
+    assert decoded['movementX'] == 0x7FFF
+    assert decoded['movementY'] == -0x8000
+
+
+@pytest.mark.parametrize('key, code', [
+    ('a', 'KeyA'),
+    ('Z', 'KeyZ'),
+    ('é', ''),
+    ('Enter', 'NumpadEnter'),
+    ('Control', 'ControlRight'),
+    ('F24', 'F24'),
+    (' ', 'Space'),
+])
+def test_key_roundtrip(key, code):
+    event = {'type': 'keydown', 'key': key, 'code': code, 'ctrlKey': True, 'shiftKey': False,
+             'altKey': True, 'metaKey': False, 'timestamp': BASE + 5}
+    (decoded,) = roundtrip([event])
+    assert decoded['key'] == key
+    assert decoded['ctrlKey'] and decoded['altKey']
+    assert not decoded['shiftKey'] and not decoded['metaKey']
+    # Codes the server does not distinguish are not transmitted
+    assert decoded['code'] == (code if code in ('NumpadEnter', 'ControlRight', 'F24', 'Space') else '')
+
+
+def test_every_named_key_roundtrips():
+    events = [{'type': 'keyup', 'key': name, 'timestamp': BASE} for name in KEY_NAMES[1:]]
+    assert [e['key'] for e in roundtrip(events)] == list(KEY_NAMES[1:])
+
+
+def test_batch_preserves_order_and_timestamps():
+    events = [
+        {'type': 'mousemove', 'movementX': i, 'movementY': -i, 'x': i, 'y': i, 'isDragging': False,
+         'timestamp': BASE + i}
+        for i in range(50)
+    ]
+    decoded = roundtrip(events)
+    assert [e['timestamp'] for e in decoded] == [BASE + i for i in range(50)]
+    assert [e['movementX'] for e in decoded] == list(range(50))
+
+
+def test_unrepresentable_key_is_rejected():
+    with pytest.raises(ValueError):
+        encode_events([{'type': 'keydown', 'key': '😀', 'timestamp': BASE}])
+    with pytest.raises(ValueError):
+        encode_events([{'type': 'keydown', 'key': 'AudioVolumeUp', 'timestamp': BASE}])
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError):
+        encode_events([{'type': 'touch', 'timestamp': BASE}])
+
+
+def test_decode_rejects_bad_frames():
+    frame = encode_events([{'type': 'wheel', 'timestamp': BASE}])
+    with pytest.raises(ProtocolError):
+        decode_events(frame[:5])
+    with pytest.raises(ProtocolError):
+        decode_events(frame[:-1])
+    with pytest.raises(ProtocolError):
+        decode_events(bytes([PROTOCOL_VERSION + 1]) + frame[1:])
+    bad_type = HEADER.pack(PROTOCOL_VERSION, 0, 1, BASE) + RECORD.pack(99, 0, 0, 0, 0, 0, 0, 0, 0)
+    with pytest.raises(ProtocolError):
+        decode_events(bad_type)
+
+
+def test_decode_accepts_memoryview():
+    frame = bytearray(encode_events([{'type': 'mousedown', 'button': 1, 'timestamp': BASE}]))
+    (decoded,) = decode_events(memoryview(frame))
+    assert decoded['button'] == 1
+
+
+def test_binary_event_behaves_like_event_dict():
+    (event,) = roundtrip([{'type': 'mousemove', 'movementX': 1, 'movementY': 2, 'timestamp': BASE}])
+    assert isinstance(event, BinaryEvent)
+    assert event.get('key', 'none') == 'none'
+    copy = event.copy()
+    copy.update({'movementX': 5, 'clientX': 99})
+    copy['movementY'] = 9
+    assert (copy['movementX'], copy['movementY']) == (5, 9)
+    assert event['movementX'] == 1
+    merged = {'type': 'mousemove'}
+    merged.update(event)
+    assert merged['movementY'] == 2
+
+
+def test_header_layout_is_little_endian():
+    frame = encode_events([{'type': 'mousemove', 'timestamp': BASE}])
+    assert struct.unpack_from('<BBHQ', frame) == (PROTOCOL_VERSION, 0, 1, BASE)
@@ -0,0 +1,55 @@
+import importlib
+import sys
+
+import pytest
+
+pytest.importorskip('flask_socketio')
+
+
+@pytest.fixture(scope='module')
+def input_service():
+    """The service module, configured at import: headless injector, no rate gate"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('INPUT_INJECTOR', 'recording')
+        mp.setenv('INPUT_MAX_RATE', '0')
+        mp.delenv('INPUT_RECORD_DIR', raising=False)
+        yield importlib.import_module('input_service')
+
+
+def test_handlers_run_in_message_order(input_service):
+    assert input_service.socketio.server.async_handlers is False
+
+
+def test_client_events_are_injected_in_order(input_service):
+    injector = input_service.injector
+    injector.calls.clear()
+    client = input_service.socketio.test_client(input_service.app)
+    base = 1_700_000_000_000
+    for i in range(50):
+        client.emit('event', {'type': 'mousedown', 'button': 0, 'timestamp': base + 4 * i})
+        client.emit('event', {'type': 'mouseup', 'button': 0, 'timestamp': base + 4 * i + 1})
+        client.emit('event', {'type': 'keydown', 'key': 'a', 'code': 'KeyA', 'timestamp': base + 4 * i + 2})
+        client.emit('event', {'type': 'keyup', 'key': 'a', 'code': 'KeyA', 'timestamp': base + 4 * i + 3})
+    client.disconnect()  # flushes the session's queue
+
+    methods = [method for _t, method, _args in injector.calls]
+    assert methods == ['press_button', 'release_button', 'press_key', 'release_key'] * 50
+
+
+def test_stats_are_only_sent_as_the_ack(input_service):
+    client = input_service.socketio.test_client(input_service.app)
+    client.get_received()
+    stats = client.emit('stats', callback=True)
+    assert 'events_submitted' in stats['session']
+    assert client.get_received() == []
+    client.disconnect()
+
+
+def test_headless_startup_does_not_load_desktop_libraries(input_service):
+    assert 'pyautogui' not in sys.modules
+    assert 'pynput' not in sys.modules
+
+
+def test_keys_route_answers_without_a_display(input_service):
+    response = input_service.app.test_client().get('/keys')
+    assert response.status_code in (200, 503)
@@ -0,0 +1,80 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+def _import_key_mapping():
+    """Import key_mapping against a stand-in pynput, which refuses to import without a display.
+
+    Only this module's reference sees the stand-in; sys.modules is restored afterwards.
+    """
+    names = ('pynput', 'pynput.keyboard', 'pynput.mouse', 'key_mapping')
+    saved = {name: sys.modules.pop(name, None) for name in names}
+    keyboard = types.ModuleType('pynput.keyboard')
+    keyboard.Key = type('Key', (), {})
+    mouse = types.ModuleType('pynput.mouse')
+    mouse.Button = type('Button', (), {name: f'Button.{name}' for name in ('left', 'middle', 'right')})
+    pynput = types.ModuleType('pynput')
+    pynput.keyboard, pynput.mouse = keyboard, mouse
+    sys.modules.update({'pynput': pynput, 'pynput.keyboard': keyboard, 'pynput.mouse': mouse})
+    try:
+        return importlib.import_module('key_mapping')
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+key_mapping = _import_key_mapping()
+
+MISSING_F_KEYS = {f'f{n}' for n in range(13, 25)}
+
+
+@pytest.fixture
+def stub_key(monkeypatch):
+    """Rebuild the tables against a platform whose pynput has no F13-F24"""
+    names = set(key_mapping.KEY_ALIASES.values()) | set(key_mapping.DOM_CODES.values())
+    names |= set(key_mapping.DOM_KEYS.values())
+    stub = type('StubKey', (), {name: f'Key.{name}' for name in names - MISSING_F_KEYS})
+    monkeypatch.setattr(key_mapping, 'Key', stub)
+    monkeypatch.setattr(key_mapping, 'KEY_TABLE', key_mapping._compile(
+        key_mapping.DOM_CODES, key_mapping.DOM_KEYS, key_mapping.KEY_ALIASES))
+    monkeypatch.setattr(key_mapping, 'CODE_TABLE', key_mapping._compile(key_mapping.DOM_CODES))
+    return stub
+
+
+def test_code_is_looked_up_before_key(stub_key):
+    resolve_key = key_mapping.resolve_key
+    assert resolve_key('Shift', 'ShiftRight') == 'Key.shift_r'
+    assert resolve_key('Control', 'ControlLeft') == 'Key.ctrl_l'
+    assert resolve_key(' ', 'Space') == 'Key.space'
+    # Layout-dependent codes are not in the code table, so the key decides
+    assert resolve_key('q', 'KeyA') == 'q'
+    assert resolve_key('Shift', '') == 'Key.shift'
+
+
+def test_function_keys_missing_on_the_platform_are_skipped(stub_key):
+    resolve_key = key_mapping.resolve_key
+    assert resolve_key('F12', 'F12') == 'Key.f12'
+    assert resolve_key('F13', 'F13') is None
+    assert resolve_key('f24') is None
+    supported = key_mapping.supported_keys()
+    assert 'f12' in supported and 'f13' not in supported
+
+
+def test_single_characters_pass_through(stub_key):
+    resolve_key = key_mapping.resolve_key
+    assert resolve_key('a', 'KeyA') == 'a'
+    assert resolve_key('A', 'KeyA') == 'A'
+    assert resolve_key('é') == 'é'
+
+
+def test_aliases_are_case_insensitive(stub_key):
+    resolve_key = key_mapping.resolve_key
+    assert resolve_key('PGUP') == 'Key.page_up'
+    assert resolve_key('Return') == 'Key.enter'
+    assert resolve_key('NoSuchKey') is None
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from frame_hub import FrameHub
+from screen_capture import FLAG_KEYFRAME, FRAME_HEADER, CaptureSizeChanged, TiledFrame, decode_frame
+from screen_capture import TestPatternSource as PatternSource  # not a test class
+
+
+def header(message):
+    _version, flags, sequence, width, height, _tile_size, count = FRAME_HEADER.unpack_from(message)
+    return flags, sequence, width, height, count
+
+
+def capture(source, frame):
+    source.grab(frame.pixels)
+    return frame.rehash()
+
+
+def test_keyframe_then_deltas_reconstruct_every_frame():
+    # 100x70 with 32px tiles leaves partial tiles on the right and bottom edges
+    source = PatternSource(100, 70, block=20, step=6)
+    frame = TiledFrame(100, 70, tile_size=32)
+    assert len(capture(source, frame)) == len(frame.tiles)
+
+    keyframe = frame.encode(frame.all_tiles, 1, keyframe=True)
+    assert header(keyframe) == (FLAG_KEYFRAME, 1, 100, 70, len(frame.tiles))
+    pixels = decode_frame(keyframe)
+    np.testing.assert_array_equal(pixels, frame.pixels)
+
+    for sequence in range(2, 12):
+        changed = capture(source, frame)
+        assert 0 < len(changed) < len(frame.tiles)  # only the moving block's tiles
+        delta = frame.encode(changed, sequence)
+        assert header(delta)[0] == 0
+        same = decode_frame(delta, pixels)
+        assert same is pixels  # deltas are applied in place
+        np.testing.assert_array_equal(pixels, frame.pixels)
+
+
+def test_unchanged_frame_has_no_dirty_tiles():
+    source = PatternSource(64, 64, step=0)
+    frame = TiledFrame(64, 64, tile_size=16)
+    capture(source, frame)
+    assert capture(source, frame) == []
+
+
+def test_compressed_tiles_are_cached_until_they_change():
+    source = PatternSource(64, 64, block=16, step=16)
+    frame = TiledFrame(64, 64, tile_size=16)
+    capture(source, frame)
+    first = [frame.compressed_tile(i) for i in frame.all_tiles]
+    changed = set(capture(source, frame))
+    for index in frame.all_tiles:
+        if index in changed:
+            assert frame.compressed_tile(index) is not first[index]
+        else:
+            assert frame.compressed_tile(index) is first[index]
+
+
+def test_decode_rejects_unknown_version():
+    frame = TiledFrame(16, 16, tile_size=16)
+    message = bytearray(frame.encode(frame.all_tiles, 1, keyframe=True))
+    message[0] = 99
+    with pytest.raises(ValueError):
+        decode_frame(bytes(message))
+
+
+class ResizingSource(PatternSource):
+    """Test pattern that switches resolution like a real display, raising CaptureSizeChanged"""
+
+    def resize(self, width, height):
+        PatternSource.__init__(self, width, height)
+
+    def grab(self, out):
+        if out.shape != (self.height, self.width, 3):
+            raise CaptureSizeChanged((self.width, self.height))
+        super().grab(out)
+
+
+def test_resize_resynchronises_with_a_keyframe():
+    source = ResizingSource(64, 48)
+    received = []
+    hub = FrameHub(source, emit=lambda sid, messages, on_ack: (received.extend(messages), on_ack()),
+                   spawn=lambda fn: None, tile_size=32)
+    hub.subscribe('viewer')
+    hub.tick()
+    pixels = decode_frame(received[-1])
+    assert pixels.shape == (48, 64, 3)
+
+    source.resize(96, 80)
+    hub.tick()
+
+    flags, _sequence, width, height, _count = header(received[-1])
+    assert (flags, width, height) == (FLAG_KEYFRAME, 96, 80)
+    pixels = decode_frame(received[-1], pixels)
+    assert pixels.shape == (80, 96, 3)
+    np.testing.assert_array_equal(pixels, hub.frame.pixels)
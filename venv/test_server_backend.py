@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from server_backend import NativeExecutor
+
+# Runs in a fresh interpreter so monkey patching does not leak into other tests
+CHECK_BACKEND = textwrap.dedent("""
+    import sys
+    import server_backend
+    server_backend.configure(["--backend", sys.argv[1]])
+    import threading, time
+    from server_backend import NativeExecutor
+
+    if sys.argv[1] == "eventlet":
+        from eventlet import patcher, spawn
+        real_ident = patcher.original("threading").get_ident
+    else:
+        from gevent import monkey, spawn
+        real_ident = monkey.get_original("threading", "get_ident")
+
+    executor = NativeExecutor(sys.argv[1])
+    idents = set()
+    active = []
+
+    def work(i):
+        active.append(i)
+        assert len(active) == 1, "calls overlapped"
+        time.sleep(0.001)
+        idents.add(real_ident())
+        active.remove(i)
+        return i
+
+    workers = [spawn(executor.run, work, i) for i in range(40)]
+    assert sorted(w.wait() if hasattr(w, "wait") else w.get() for w in workers) == list(range(40))
+    assert len(idents) == 1 and real_ident() not in idents, idents
+    try:
+        executor.run(lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    else:
+        raise AssertionError("error not propagated")
+    executor.shutdown()
+    print("ok")
+""")
+
+
+@pytest.mark.parametrize('backend', ['eventlet', 'gevent'])
+def test_green_backends_use_one_dedicated_thread(backend):
+    pytest.importorskip(backend)
+    result = subprocess.run([sys.executable, '-c', CHECK_BACKEND, backend],
+                            capture_output=True, text=True, timeout=60, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip().endswith('ok'), result.stderr
+
+
+def test_threading_backend_uses_one_thread():
+    executor = NativeExecutor('threading')
+    idents = {executor.run(threading.get_ident) for _ in range(20)}
+    executor.shutdown()
+    assert len(idents) == 1 and threading.get_ident() not in idents
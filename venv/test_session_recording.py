@@ -0,0 +1,123 @@
+from injectors import RecordingInjector, open_injector
+from input_handler import InputHandler
+from session_recording import SessionRecorder, read_recording, replay
+
+BASE = 1_700_000_000_000
+
+EVENTS = [
+    {'type': 'mousemove', 'x': 10, 'y': 20, 'movementX': 0, 'movementY': 0, 'isDragging': False, 'timestamp': BASE},
+    {'type': 'mousedown', 'button': 0, 'x': 10, 'y': 20, 'timestamp': BASE + 5},
+    {'type': 'mouseup', 'button': 0, 'x': 10, 'y': 20, 'timestamp': BASE + 9},
+    {'type': 'wheel', 'deltaX': 0, 'deltaY': 100, 'timestamp': BASE + 12},
+    {'type': 'keydown', 'key': 'a', 'code': 'KeyA', 'ctrlKey': True, 'shiftKey': False,
+     'altKey': False, 'metaKey': False, 'timestamp': BASE + 20},
+    {'type': 'keyup', 'key': 'a', 'code': 'KeyA', 'ctrlKey': True, 'shiftKey': False,
+     'altKey': False, 'metaKey': False, 'timestamp': BASE + 30},
+    # Not representable in the binary protocol, stored as JSON
+    {'type': 'keydown', 'key': 'AudioVolumeUp', 'code': '', 'timestamp': BASE + 40},
+]
+
+
+def record(path, events=EVENTS):
+    recorder = SessionRecorder(str(path))
+    for event in events:
+        recorder.write(event)
+    recorder.close()
+    return recorder
+
+
+def test_recording_roundtrip(tmp_path):
+    path = tmp_path / 'session.rec'
+    assert record(path).events_written == len(EVENTS)
+
+    replayed = [event for _delay, event in read_recording(str(path))]
+    assert [e['type'] for e in replayed] == [e['type'] for e in EVENTS]
+    assert replayed[4]['key'] == 'a' and replayed[4]['ctrlKey']
+    assert replayed[6]['key'] == 'AudioVolumeUp'
+    # 5-byte magic + 9-byte header, then 7-byte record headers around 16-byte binary records
+    assert path.stat().st_size < 14 + 6 * (7 + 16) + 7 + 80
+
+
+def test_recording_is_append_only(tmp_path):
+    path = tmp_path / 'session.rec'
+    record(path, EVENTS[:2])
+    record(path, EVENTS[2:4])
+    assert len(list(read_recording(str(path)))) == 4
+
+
+def test_replay_through_handler(tmp_path):
+    path = tmp_path / 'session.rec'
+    record(path)
+    injector = RecordingInjector()
+    handler = InputHandler(injector, execute_inputs=True, max_rate=0)
+
+    result = replay(str(path), handler, speed=0)
+
+    assert result['events'] == len(EVENTS)
+    assert result['events_injected'] == len(EVENTS)
+    calls = [(method, args) for _t, method, args in injector.calls]
+    assert calls[:4] == [
+        ('move_to', (10, 20)),
+        ('press_button', (0,)),
+        ('release_button', (0,)),
+        ('scroll', (0.0, -1.0)),
+    ]
+    assert ('press_key', ('Control', None)) in calls
+    assert ('press_key', ('a', '')) in calls
+    assert ('release_key', ('a', '')) in calls
+
+
+def test_replay_at_fixed_rate_coalesces_moves(tmp_path):
+    path = tmp_path / 'moves.rec'
+    record(path, [
+        {'type': 'mousemove', 'movementX': 1, 'movementY': 1, 'timestamp': BASE + i}
+        for i in range(200)
+    ])
+    injector = RecordingInjector()
+    handler = InputHandler(injector, execute_inputs=True, max_rate=50)
+
+    result = replay(str(path), handler, rate=2000)
+
+    moves = [args for _t, method, args in injector.calls if method == 'move_by']
+    assert sum(dx for dx, _dy in moves) == 200
+    assert result['events_coalesced'] > 0
+    assert len(moves) < 200
+
+
+def test_recording_injector_keeps_only_the_latest_calls():
+    injector = open_injector('recording')
+    for x in range(injector.calls.maxlen + 5):
+        injector.move_to(x, 0)
+    assert len(injector.calls) == injector.calls.maxlen
+    assert injector.calls[0][2] == (5, 0)
+
+
+def test_release_all_releases_held_input():
+    injector = RecordingInjector()
+    handler = InputHandler(injector, execute_inputs=True)
+    handler.handle_event({'type': 'keydown', 'key': 'Control', 'code': 'ControlLeft', 'ctrlKey': True})
+    handler.handle_event({'type': 'keydown', 'key': 'c', 'code': 'KeyC', 'ctrlKey': True})
+    handler.handle_event({'type': 'mousedown', 'button': 2})
+    handler.close()
+    injector.calls.clear()
+
+    handler.release_all()
+
+    released = {(method, args) for _t, method, args in injector.calls}
+    assert released == {
+        ('release_key', ('c', 'KeyC')),
+        ('release_key', ('Control', 'ControlLeft')),
+        ('release_button', (2,)),
+    }
+
+
+def test_records_events_with_missing_or_odd_fields(tmp_path):
+    path = tmp_path / 'odd.rec'
+    record(path, [
+        {'type': 'mousedown', 'button': 0, 'timestamp': None},
+        {'type': 'mousemove', 'x': None, 'y': 'left', 'timestamp': BASE},
+    ])
+
+    replayed = [event for _delay, event in read_recording(str(path))]
+    assert [e['type'] for e in replayed] == ['mousedown', 'mousemove']
+    assert replayed[1]['y'] == 'left'
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from injectors import RecordingInjector
+from input_metrics import InputMetrics
+from text_transfer import PASTE_MODIFIER, TextTransferError, TextTransferManager
+
+
+class Notifications:
+    """Collects notify() calls and lets a test wait for text_done"""
+
+    def __init__(self):
+        self.messages = []
+        self.done = threading.Event()
+
+    def __call__(self, event, payload):
+        self.messages.append((event, payload))
+        if event == 'text_done':
+            self.done.set()
+
+    def result(self):
+        assert self.done.wait(5)
+        return next(payload for event, payload in self.messages if event == 'text_done')
+
+
+def make_manager(**kwargs):
+    injector = RecordingInjector()
+    notify = Notifications()
+    options = dict(type_rate=0, batch_size=4, chunk_size=8, window=4, max_pending=16, metrics=InputMetrics())
+    options.update(kwargs)
+    return TextTransferManager(injector, notify=notify, **options), injector, notify
+
+
+def calls(injector):
+    return [(method, args) for _t, method, args in injector.calls]
+
+
+def test_type_mode_injects_in_batches():
+    manager, injector, notify = make_manager()
+    assert manager.begin('t1', 'type', 10)['chunk_size'] == 8
+    manager.add_chunk('t1', 0, 'hello ')
+    manager.add_chunk('t1', 1, 'you!')
+    manager.end('t1')
+
+    assert notify.result() == {'id': 't1', 'ok': True, 'injected': 10, 'error': None}
+    typed = [args[0] for method, args in calls(injector) if method == 'type_text']
+    assert ''.join(typed) == 'hello you!'
+    assert max(len(batch) for batch in typed) <= 4
+    assert manager.metrics.text_chars.values == {'type': 10}
+    manager.close()
+
+
+def test_paste_mode_sets_clipboard_once_and_presses_chord():
+    manager, injector, notify = make_manager()
+    manager.begin('p1', 'paste')
+    for seq, chunk in enumerate(['a' * 8, 'b' * 8, 'c']):
+        manager.add_chunk('p1', seq, chunk)
+    manager.end('p1')
+
+    assert notify.result()['injected'] == 17
+    assert calls(injector) == [
+        ('set_clipboard', ('a' * 8 + 'b' * 8 + 'c',)),
+        ('press_key', (PASTE_MODIFIER, None)),
+        ('press_key', ('v', None)),
+        ('release_key', ('v', None)),
+        ('release_key', (PASTE_MODIFIER, None)),
+    ]
+    manager.close()
+
+
+def test_credit_shrinks_while_typing_lags():
+    release = threading.Event()
+    manager, injector, notify = make_manager(run_blocking=lambda fn, *args: release.wait(5) and fn(*args),
+                                           progress_interval=60)
+    assert manager.begin('t1', 'type')['credit'] == 2  # max_pending 16 / chunk_size 8
+
+    assert manager.add_chunk('t1', 0, 'x' * 8)['credit'] == 1
+    assert manager.add_chunk('t1', 1, 'y' * 8)['credit'] == 0
+    release.set()
+    manager.end('t1')
+
+    notify.result()
+    progress = [payload for event, payload in notify.messages if event == 'text_progress']
+    # Only the message that tells the stalled client to resume, not the throttled ones
+    assert [p['credit'] for p in progress] == [1]
+    manager.close()
+
+
+def test_chunk_larger_than_max_pending_still_gets_credit():
+    manager, injector, notify = make_manager(chunk_size=32, max_pending=16, progress_interval=60)
+    assert manager.begin('t1', 'type')['credit'] == 1
+
+    manager.add_chunk('t1', 0, 'z' * 20)
+    manager.end('t1')
+    assert notify.result()['injected'] == 20
+    manager.close()
+
+
+def test_rejects_bad_requests():
+    manager, _injector, _notify = make_manager(max_length=10)
+    with pytest.raises(TextTransferError):
+        manager.begin('t1', 'shout')
+    with pytest.raises(TextTransferError):
+        manager.begin('t1', 'type', 11)
+    manager.begin('t1', 'type', 4)
+    with pytest.raises(TextTransferError):
+        manager.add_chunk('t1', 1, 'ab')  # out of order
+    with pytest.raises(TextTransferError):
+        manager.add_chunk('t1', 0, 'abcde')  # longer than announced
+    with pytest.raises(TextTransferError):
+        manager.add_chunk('missing', 0, 'ab')
+    # Malformed JSON from the client must still produce an ack
+    for bad in (lambda: manager.begin(['t2']), lambda: manager.begin('t2', 'type', '4'),
+                lambda: manager.begin('t2', 'type', 2.5), lambda: manager.add_chunk({}, 0, 'ab'),
+                lambda: manager.add_chunk('t1', '0', 'ab'), lambda: manager.end(['t1']),
+                lambda: manager.cancel({'id': 1})):
+        with pytest.raises(TextTransferError):
+            bad()
+    manager.close()
+
+
+def test_cancel_stops_transfer():
+    release = threading.Event()
+    manager, injector, notify = make_manager(run_blocking=lambda fn, *args: release.wait(5) and fn(*args))
+    manager.begin('t1', 'paste')
+    manager.add_chunk('t1', 0, 'secret')
+    manager.cancel('t1')
+    release.set()
+
+    assert notify.result() == {'id': 't1', 'ok': False, 'injected': 0, 'error': 'cancelled'}
+    assert not injector.calls
+    assert manager.get_stats()['text_transfers_cancelled'] == 1
+    manager.close()
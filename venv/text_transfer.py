@@ -0,0 +1,340 @@
+"""Bulk text and clipboard transfer.
+
+Long text (a paste, a snippet) is streamed as chunks instead of one
+keydown/keyup pair per character::
+
+    text_begin  {id, mode, length}   -> ack {ok, id, chunk_size, credit}
+    text_chunk  {id, seq, data}      -> ack {ok, id, received, credit}
+    text_end    {id}                 -> ack {ok, id, received}
+    text_cancel {id}                 -> ack {ok, id}
+
+The server reports ``text_progress`` {id, received, injected, total, credit}
+while a transfer runs and ``text_done`` {id, ok, injected, error} at the end.
+
+Modes:
+
+* ``type``      - typed with ``Injector.type_text`` in batches of ``batch_size``
+                  characters at ``type_rate`` characters per second, starting
+                  with the first chunk
+* ``paste``     - one clipboard set plus the paste chord once the text is complete
+* ``clipboard`` - only sets the host clipboard
+
+Flow control: a client may have ``credit`` unacknowledged chunks in flight.
+In ``type`` mode credit shrinks while typing lags behind, so no more than
+``max_pending`` characters are buffered per session. Every batch is its own
+call on the injection thread, so mouse and key events queued behind a transfer
+are injected between batches rather than after all of it.
+"""
+import collections
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MODES = ('type', 'paste', 'clipboard')
+PASTE_MODIFIER = 'Meta' if sys.platform == 'darwin' else 'Control'
+
+
+class TextTransferError(ValueError):
+    """Raised for transfer requests that cannot be accepted"""
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_id(transfer_id):
+    if not (isinstance(transfer_id, str) or _is_int(transfer_id)):
+        raise TextTransferError(f'Text transfer id must be a string or integer, not {type(transfer_id).__name__}')
+
+
+class TextTransfer:
+    """One transfer: received chunks waiting to be injected, and its counters"""
+
+    def __init__(self, transfer_id, mode, length):
+        self.id = transfer_id
+        self.mode = mode
+        self.length = length
+        self.chunks = collections.deque()
+        self.offset = 0  # characters of chunks[0] already taken
+        self.next_seq = 0
+        self.received = 0
+        self.injected = 0
+        self.complete = False
+        self.cancelled = False
+        self.started = time.monotonic()
+        self.reported_at = self.started
+        self.reported_credit = None
+
+    @property
+    def pending(self):
+        return self.received - self.injected
+
+    def take(self, size):
+        """Remove and return up to ``size`` received characters"""
+        parts = []
+        while size > 0 and self.chunks:
+            chunk = self.chunks[0]
+            part = chunk[self.offset:self.offset + size]
+            parts.append(part)
+            size -= len(part)
+            self.offset += len(part)
+            if self.offset >= len(chunk):
+                self.chunks.popleft()
+                self.offset = 0
+        return ''.join(parts)
+
+
+class TextTransferManager:
+    """Receives chunked text for one session and injects it on a worker thread.
+
+    ``notify(event, payload)`` sends progress back to the client and
+    ``run_blocking(fn, *args)`` runs injector calls on the injection thread.
+    Transfers run one at a time, in the order they were begun.
+    """
+
+    def __init__(self, injector, run_blocking=None, notify=None, metrics=None, execute=True,
+                 type_rate=200, batch_size=16, chunk_size=8192, window=4, max_pending=65536,
+                 max_length=1_000_000, progress_interval=0.1, sleep=time.sleep):
+        self.injector = injector
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self.notify = notify or (lambda event, payload: None)
+        self.metrics = metrics
+        self.execute = execute
+        self.type_rate = type_rate
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.window = window
+        self.max_pending = max_pending
+        self.max_length = max_length
+        self.progress_interval = progress_interval
+        self.sleep = sleep
+
+        self.transfers = {}
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._worker = None
+
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.chars_injected = 0
+
+    def credit(self, transfer):
+        """Chunks the client may send before its next ack or progress message"""
+        if transfer.mode != 'type':
+            return self.window
+        room = self.max_pending - transfer.pending
+        credit = max(0, min(self.window, room // self.chunk_size))
+        # With nothing buffered one chunk is always allowed, even one larger than max_pending
+        return credit if credit or transfer.pending else min(self.window, 1)
+
+    def _get(self, transfer_id):
+        _check_id(transfer_id)
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None or transfer.cancelled:
+            raise TextTransferError(f'Unknown text transfer: {transfer_id}')
+        return transfer
+
+    def begin(self, transfer_id, mode='type', length=None):
+        """Start a transfer; ``length`` (characters) is optional but checked at the end"""
+        if transfer_id is None:
+            raise TextTransferError('Text transfer id is required')
+        _check_id(transfer_id)
+        if not isinstance(mode, str) or mode not in MODES:
+            raise TextTransferError(f"Unknown text transfer mode: {mode} (choose from {', '.join(MODES)})")
+        if length is not None and not _is_int(length):
+            raise TextTransferError(f'Text length must be an integer, not {type(length).__name__}')
+        if length is not None and not 0 <= length <= self.max_length:
+            raise TextTransferError(f'Text of {length} characters exceeds the {self.max_length} limit')
+        with self._cond:
+            if not self._running:
+                raise TextTransferError('Session is closing')
+            if transfer_id in self.transfers:
+                raise TextTransferError(f'Text transfer {transfer_id} already exists')
+            transfer = self.transfers[transfer_id] = TextTransfer(transfer_id, mode, length)
+            self._queue.append(transfer)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='text-transfer', daemon=True)
+                self._worker.start()
+            return {'ok': True, 'id': transfer_id, 'chunk_size': self.chunk_size, 'credit': self.credit(transfer)}
+
+    def add_chunk(self, transfer_id, seq, data):
+        """Append the next chunk of a transfer"""
+        if not isinstance(data, str):
+            raise TextTransferError('Chunk data must be a string')
+        if not _is_int(seq):
+            raise TextTransferError(f'Chunk seq must be an integer, not {type(seq).__name__}')
+        with self._cond:
+            transfer = self._get(transfer_id)
+            if transfer.complete:
+                raise TextTransferError(f'Text transfer {transfer_id} already ended')
+            if seq != transfer.next_seq:
+                raise TextTransferError(f'Expected chunk {transfer.next_seq} of {transfer_id}, got {seq}')
+            limit = self.max_length if transfer.length is None else transfer.length
+            if transfer.received + len(data) > limit:
+                raise TextTransferError(f'Text transfer {transfer_id} is longer than {limit} characters')
+            transfer.next_seq += 1
+            if data:
+                transfer.chunks.append(data)
+                transfer.received += len(data)
+                self._cond.notify()
+            credit = self.credit(transfer)
+            transfer.reported_credit = credit
+            return {'ok': True, 'id': transfer_id, 'received': transfer.received, 'credit': credit}
+
+    def end(self, transfer_id):
+        """Mark a transfer complete; paste and clipboard transfers are injected now"""
+        with self._cond:
+            transfer = self._get(transfer_id)
+            if transfer.length is not None and transfer.received != transfer.length:
+                raise TextTransferError(
+                    f'Text transfer {transfer_id} ended after {transfer.received} of {transfer.length} characters')
+            transfer.complete = True
+            self._cond.notify()
+            return {'ok': True, 'id': transfer_id, 'received': transfer.received}
+
+    def cancel(self, transfer_id):
+        """Stop a transfer; text already injected stays injected"""
+        with self._cond:
+            transfer = self._get(transfer_id)
+            transfer.cancelled = True
+            self._cond.notify()
+            return {'ok': True, 'id': transfer_id}
+
+    def send(self, text, mode='type'):
+        """Queue a whole text at once (the single-message ``type`` event)"""
+        transfer_id = f'inline-{time.monotonic_ns()}'
+        self.begin(transfer_id, mode, len(text))
+        with self._cond:
+            transfer = self.transfers[transfer_id]
+            transfer.chunks.append(text)
+            transfer.received = len(text)
+            transfer.complete = True
+            self._cond.notify()
+        return transfer_id
+
+    def close(self, timeout=1.0):
+        """Cancel every transfer and stop the worker"""
+        with self._cond:
+            self._running = False
+            for transfer in self._queue:
+                transfer.cancelled = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def _ready(self, transfer):
+        if transfer.cancelled or transfer.complete:
+            return True
+        return transfer.mode == 'type' and transfer.pending > 0
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not (self._queue and self._ready(self._queue[0])):
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                transfer = self._queue[0]
+                if transfer.cancelled:
+                    self._finish(transfer, 'cancelled')
+                    continue
+                if transfer.mode == 'type':
+                    text = transfer.take(self.batch_size)
+                else:
+                    text = transfer.take(transfer.received)
+                done = transfer.complete and not transfer.chunks
+
+            started = time.monotonic()
+            try:
+                if text and self.execute:
+                    if transfer.mode == 'type':
+                        self.run_blocking(self.injector.type_text, text)
+                    else:
+                        self.run_blocking(self._set_clipboard, text, transfer.mode == 'paste')
+            except Exception as e:
+                logger.error(f"Text transfer {transfer.id} failed: {e}")
+                with self._cond:
+                    self._finish(transfer, str(e))
+                continue
+
+            with self._cond:
+                transfer.injected += len(text)
+                self.chars_injected += len(text)
+                if self.metrics:
+                    self.metrics.text_chars.inc(transfer.mode, len(text))
+                if done:
+                    self._finish(transfer)
+                    continue
+                self._report(transfer)
+
+            # Typing rate limit; injection calls from other events run in between
+            wait = len(text) / self.type_rate - (time.monotonic() - started) if self.type_rate else 0
+            if wait > 0:
+                self.sleep(wait)
+
+    def _set_clipboard(self, text, paste):
+        self.injector.set_clipboard(text)
+        if paste:
+            self.injector.press_key(PASTE_MODIFIER)
+            try:
+                self.injector.press_key('v')
+                self.injector.release_key('v')
+            finally:
+                self.injector.release_key(PASTE_MODIFIER)
+
+    def _report(self, transfer):
+        """Send progress if it is due, or if the client may be waiting for credit"""
+        now = time.monotonic()
+        credit = self.credit(transfer)
+        unblocked = credit and not transfer.reported_credit
+        if not unblocked and now - transfer.reported_at < self.progress_interval:
+            return
+        transfer.reported_at = now
+        transfer.reported_credit = credit
+        self.notify('text_progress', {
+            'id': transfer.id,
+            'received': transfer.received,
+            'injected': transfer.injected,
+            'total': transfer.length,
+            'credit': credit,
+        })
+
+    def _finish(self, transfer, error=None):
+        """Remove the head transfer and tell the client how it ended (lock held)"""
+        self._queue.popleft()
+        self.transfers.pop(transfer.id, None)
+        if error is None:
+            self.completed += 1
+            result = 'completed'
+        elif transfer.cancelled:
+            self.cancelled += 1
+            result = 'cancelled'
+        else:
+            self.failed += 1
+            result = 'failed'
+        if self.metrics:
+            self.metrics.text_transfers.inc(result)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Text transfer {transfer.id} {result}: {transfer.injected} characters "
+                         f"in {time.monotonic() - transfer.started:.2f}s")
+        self.notify('text_done', {
+            'id': transfer.id,
+            'ok': error is None,
+            'injected': transfer.injected,
+            'error': error,
+        })
+
+    def get_stats(self):
+        """Transfer counters for the ``stats`` event"""
+        return {
+            'text_transfers_active': len(self._queue),
+            'text_transfers_completed': self.completed,
+            'text_transfers_cancelled': self.cancelled,
+            'text_transfers_failed': self.failed,
+            'text_chars_injected': self.chars_injected,
+        }